@@ -0,0 +1,240 @@
+# alerts.py – TELEGRAM ALERTS: DEDUP STORE + QUEUED, COALESCING DISPATCH
+import hashlib
+import html
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import metrics
+from config import INSIDER_WINDOW_DAYS, TELEGRAM_CHAT_ID, TELEGRAM_TOKEN, data_path
+from http_client import get_session
+
+log = logging.getLogger(__name__)
+
+DEDUP_WINDOW = int(os.getenv('ALERT_DEDUP_WINDOW', 24 * 3600))
+CLUSTER_DEDUP_WINDOW = INSIDER_WINDOW_DAYS * 24 * 3600
+TELEGRAM_MAX_CHARS = 4096
+
+
+# === TELEGRAM SEND ===
+# post_telegram returns (result, retry_after):
+#   SENT, RETRY (429 / 5xx / network – retry_after set on 429),
+#   REJECTED (any other 4xx – resending the same text can't help), DISABLED (no bot configured)
+SENT, RETRY, REJECTED, DISABLED = 'sent', 'retry', 'rejected', 'disabled'
+
+
+def telegram_enabled():
+    return bool(TELEGRAM_TOKEN and TELEGRAM_CHAT_ID)
+
+
+def post_telegram(message):
+    if not telegram_enabled():
+        return DISABLED, None
+    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
+    payload = {
+        "chat_id": TELEGRAM_CHAT_ID,
+        "text": message,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True
+    }
+    try:
+        response = get_session().post(url, data=payload, timeout=10)
+    except Exception as e:
+        log.error("Telegram Failed: %s", e)
+        return RETRY, None
+    if response.status_code == 200:
+        return SENT, None
+    if response.status_code == 429:
+        try:
+            retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+        except ValueError:
+            retry_after = 1
+        return RETRY, retry_after
+    log.error("Telegram Error: %s – %s", response.status_code, response.text)
+    return (RETRY if response.status_code >= 500 else REJECTED), None
+
+
+def send_telegram(message):
+    return post_telegram(message)[0] == SENT
+
+
+# Every field is escaped for parse_mode=HTML ("AT&T", "<"), and the summary is
+# cut to fit before the markup goes around it, so no tag is ever split.
+def format_alert(sig, grok_summary="", max_chars=TELEGRAM_MAX_CHARS):
+    head = (f"<b>{html.escape(str(sig['ticker']))}: {html.escape(sig['type'])}</b>\n"
+            f"{html.escape(sig.get('title', '')[:100])}...\n"
+            f"<a href=\"{html.escape(sig.get('link', ''), quote=True)}\">View</a>\n")
+    summary = grok_summary or ""
+    body = html.escape(summary)
+    while summary and len(head) + len(body) > max_chars:
+        summary = summary[:len(summary) - (len(head) + len(body) - max_chars)]
+        body = html.escape(summary)
+    return head + body
+
+
+# A cluster stays active for up to INSIDER_WINDOW_DAYS: it is keyed on its latest
+# buy date and held for that long, so it alerts again only when a newer buy joins
+def fingerprint(sig):
+    key = sig.get('window', ['', ''])[1] if sig.get('type') == 'Insider Cluster' else sig.get('link', '')
+    return hashlib.sha1(f"{sig.get('ticker', '')}|{sig.get('type', '')}|{key}".encode()).hexdigest()
+
+
+def dedup_window(sig):
+    return CLUSTER_DEDUP_WINDOW if sig.get('type') == 'Insider Cluster' else DEDUP_WINDOW
+
+
+# === DEDUP STORE ===
+class AlertStore:
+    def __init__(self, path=None, window=DEDUP_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path or data_path('alerts.sqlite'), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS sent (fp TEXT PRIMARY KEY, sent_at REAL NOT NULL, expires REAL)")
+        try:
+            self.db.execute("ALTER TABLE sent ADD COLUMN expires REAL")   # stores from before per-alert windows
+        except sqlite3.OperationalError:
+            pass
+        self.db.commit()
+
+    # Returns the subset of fingerprints not sent within their window and claims them.
+    # windows (optional dict fp -> seconds) overrides the store's window per fingerprint.
+    def claim(self, fps, windows=None):
+        now = time.time()
+        windows = windows or {}
+        fresh = []
+        with self._lock:
+            for fp in dict.fromkeys(fps):
+                row = self.db.execute("SELECT COALESCE(expires, sent_at + ?) FROM sent WHERE fp = ?",
+                                      (self.window, fp)).fetchone()
+                if row and row[0] > now:
+                    continue
+                fresh.append(fp)
+            self.db.executemany("INSERT OR REPLACE INTO sent (fp, sent_at, expires) VALUES (?, ?, ?)",
+                                [(fp, now, now + windows.get(fp, self.window)) for fp in fresh])
+            self.db.execute("DELETE FROM sent WHERE COALESCE(expires, sent_at + ?) < ?", (self.window, now))
+            self.db.commit()
+        return fresh
+
+    # Give a claim back when delivery ultimately failed, so the next scan retries it
+    def release(self, fps):
+        with self._lock:
+            self.db.executemany("DELETE FROM sent WHERE fp = ?", [(fp,) for fp in fps])
+            self.db.commit()
+
+
+# === QUEUED DISPATCH ===
+# A single worker drains the queue, coalesces whatever arrives within
+# `coalesce_window` into one message (up to Telegram's size limit), and
+# backs off on 429 using retry_after. Callers never block on the network.
+# Messages must already fit max_chars (format_alert sees to it).
+class TelegramDispatcher:
+    def __init__(self, store=None, send=post_telegram, coalesce_window=2.0, max_chars=TELEGRAM_MAX_CHARS, max_retries=5):
+        self.store = store
+        self.send = send
+        self.coalesce_window = coalesce_window
+        self.max_chars = max_chars
+        self.max_retries = max_retries
+        self.q = queue.Queue()
+        self._carry = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # False when no bot is configured (an injected `send` always counts as enabled)
+    @property
+    def enabled(self):
+        return self.send is not post_telegram or telegram_enabled()
+
+    def submit(self, message, fp=None):
+        self._ensure_worker()
+        self.q.put((message, fp))
+
+    def flush(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while self.q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+        return not self.q.unfinished_tasks
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='telegram-dispatch', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._carry] if self._carry else [self.q.get()]
+        self._carry = None
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            try:
+                item = self.q.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if size + 2 + len(item[0]) > self.max_chars:
+                self._carry = item
+                break
+            batch.append(item)
+            size += 2 + len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._deliver(batch)
+            except Exception:
+                log.exception("Telegram dispatch failed")
+            for _ in batch:
+                self.q.task_done()
+
+    # Only transient failures are retried. A rejected coalesced batch is split so
+    # one bad alert can't sink the rest; a rejected single alert is dropped and
+    # keeps its claim (resending it every scan would fail the same way).
+    def _deliver(self, batch):
+        text = "\n\n".join(m for m, _ in batch)
+        result = self._send(text)
+        if result == SENT:
+            metrics.inc('telegram_alerts_total', len(batch), result='sent')
+            return True
+        if result == REJECTED and len(batch) > 1:
+            return all([self._deliver([item]) for item in batch])
+        if result == REJECTED:
+            log.error("Telegram rejected alert, dropping it: %.200s", text)
+            metrics.inc('telegram_alerts_total', result='rejected')
+            return False
+        log.error("Dropping %d Telegram alert(s): %s", len(batch), result)
+        metrics.inc('telegram_alerts_total', len(batch), result='dropped')
+        if self.store:
+            # transient (or no bot configured): give the claims back so a later scan retries
+            self.store.release([fp for _, fp in batch if fp])
+        return False
+
+    def _send(self, text):
+        delay = 1
+        for attempt in range(self.max_retries):
+            with metrics.timer('telegram_send_seconds'):
+                result, retry_after = self.send(text)
+            metrics.inc('telegram_messages_total', result='rate_limited' if retry_after else result)
+            if result != RETRY or attempt == self.max_retries - 1:
+                return result
+            if retry_after:
+                time.sleep(retry_after)
+            else:
+                time.sleep(delay)
+                delay *= 2
+        return RETRY
+
+
+_DISPATCHER = None
+_DISPATCHER_LOCK = threading.Lock()
+
+
+def get_dispatcher():
+    global _DISPATCHER
+    with _DISPATCHER_LOCK:
+        if _DISPATCHER is None:
+            _DISPATCHER = TelegramDispatcher(store=AlertStore())
+    return _DISPATCHER
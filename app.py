@@ -1,23 +1,17 @@
 # app.py – M&A SCANNER: FULLY WORKING, NO ERRORS, ALL FEATURES
+# pandas, plotly, yfinance (market_data / options_screener), bs4 and feedparser
+# are imported inside the code paths that use them, so a cold start draws the
+# shell and the last scan without loading them (see bench/bench_startup.py).
 import streamlit as st
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import re
-import time
+import json
+import threading
 from datetime import datetime
-from dotenv import load_dotenv
-import os
-import feedparser
-import yfinance as yf
-import plotly.graph_objects as go
-
-# === Load Env (LOCAL) / Secrets (CLOUD) ===
-load_dotenv()
-API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY') or st.secrets.get("ALPHA_VANTAGE_API_KEY", "")
-XAI_API_KEY = os.getenv('XAI_API_KEY') or st.secrets.get("XAI_API_KEY", "")
-TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN') or st.secrets.get("TELEGRAM_TOKEN", "")
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID') or st.secrets.get("TELEGRAM_CHAT_ID", "")
+
+import grok
+import metrics
+import scanner
+from history import HistoryStore
+from config import API_KEY, MONTHLY_TOKEN_LIMIT, PEER_COUNT, RECENT_SIGNAL_HOURS, SCAN_INTERVAL, TELEGRAM_CHAT_ID, TELEGRAM_TOKEN, XAI_API_KEY
 
 if not API_KEY:
     st.error("Set ALPHA_VANTAGE_API_KEY in .env (local) or .streamlit/secrets.toml (cloud)")
@@ -27,37 +21,6 @@ if not XAI_API_KEY:
 if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
     st.warning("Set TELEGRAM_TOKEN & TELEGRAM_CHAT_ID for alerts")
 
-# === TOKEN TRACKING (FULLY RESTORED) ===
-MONTHLY_TOKEN_LIMIT = 1000000
-if 'SESSION_TOKENS' not in st.session_state:
-    st.session_state.SESSION_TOKENS = 0
-
-# === SCAN HISTORY ===
-if 'SCAN_HISTORY' not in st.session_state:
-    st.session_state.SCAN_HISTORY = []
-
-# === TELEGRAM SEND (FIXED + DEBUG) ===
-def send_telegram(message):
-    if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
-        return False
-    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }
-    try:
-        response = requests.post(url, data=payload, timeout=10)
-        if response.status_code == 200:
-            return True
-        else:
-            st.error(f"Telegram Error: {response.status_code} – {response.text}")
-            return False
-    except Exception as e:
-        st.error(f"Telegram Failed: {str(e)}")
-        return False
-
 # === Page Config & Theme ===
 st.set_page_config(page_title="M&A Scanner – @EastofElgin", layout="wide")
 st.title("M&A Pro Scanner")
@@ -104,181 +67,106 @@ st.markdown("""
 </script>
 """, unsafe_allow_html=True)
 
-HEADERS = {'User-Agent': 'Mozilla/5.0'}
-
-# === GROK AI + TOKEN TRACKING (FULLY RESTORED) ===
-@st.cache_data(ttl=300)
+# === GROK AI + TOKEN TRACKING (persisted usage, content-hash cache) ===
 def analyze_with_grok(filing_text, signal_type, ticker):
-    if not XAI_API_KEY or not filing_text:
-        return "Grok analysis unavailable."
-    url = "https://api.x.ai/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {XAI_API_KEY}", "Content-Type": "application/json"}
-    prompt = f"Analyze {signal_type} for {ticker}: M&A, risks, entities. Bullet points. Filing: {filing_text[:3000]}..."
-    payload = {
-        "model": "grok-4",
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": 500,
-        "temperature": 0.2
-    }
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        if response.status_code == 200:
-            data = response.json()
-            usage = data.get('usage', {})
-            prompt_tokens = usage.get('prompt_tokens', 0)
-            completion_tokens = usage.get('completion_tokens', 0)
-            total_tokens = prompt_tokens + completion_tokens
-            st.session_state.SESSION_TOKENS += total_tokens
-            cost = (prompt_tokens / 1e6 * 5) + (completion_tokens / 1e6 * 15)
-            st.markdown(f"<div class='token-info'>Tokens: {prompt_tokens} in + {completion_tokens} out = {total_tokens} (~${cost:.3f})</div>", unsafe_allow_html=True)
-            return data['choices'][0]['message']['content']
-        else:
-            return f"API Error: {response.status_code}"
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-# === SIGNALS + DEBUG MODE ===
-@st.cache_data(ttl=300)
-def get_signals(_debug=False):
-    signals = []
-    raw_data = {'news': [], 'sec': [], 'insiders': []}
-
-    # === 1. M&A News ===
-    try:
-        r = requests.get("https://finance.yahoo.com/news/", headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(r.text, 'html.parser')
-        for h in soup.find_all('h3', class_='Mb(5px)'):
-            text = h.get_text()
-            raw_data['news'].append(text)
-            link_tag = h.find_parent('a')
-            link = requests.compat.urljoin("https://finance.yahoo.com", link_tag['href']) if link_tag else ""
-            if any(k in text.lower() for k in ['acquire', 'merger', 'buyout']):
-                tickers = re.findall(r'\b[A-Z]{1,5}\b', text)
-                if tickers:
-                    signals.append({
-                        'type': 'M&A News',
-                        'ticker': tickers[0],
-                        'title': text,
-                        'link': link,
-                        'source': 'Yahoo Finance',
-                        'filing_text': ''
-                    })
-    except Exception as e:
-        st.warning(f"News scrape failed: {e}")
-
-    # === 2. SEC 8-K & 13D ===
-    try:
-        feed = feedparser.parse("https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type=&company=&dateb=&owner=include&start=0&count=100&output=atom")
-        for e in feed.entries[:30]:
-            title = e.title
-            link = e.link
-            summary = e.summary if 'summary' in e else ''
-            raw_data['sec'].append({'title': title, 'link': link})
-            cik_match = re.search(r'CIK=(\d+)', link)
-            if not cik_match: continue
-            cik = cik_match.group(1)
-            ticker = cik_to_ticker(cik)
-            if not ticker: continue
-            filing_text = f"Title: {title}\nSummary: {summary}"
-
-            if '8-K' in title.upper() and any(k in title.lower() for k in ['acquisition', 'merger']):
-                signals.append({'type': 'SEC 8-K', 'ticker': ticker, 'title': title, 'link': link, 'cik': cik, 'filing_text': filing_text})
-            if any(x in title.upper() for x in ['SC 13D', 'SC 13G']):
-                stake = re.search(r'(\d+\.\d+)%', title)
-                if stake and float(stake.group(1)) >= 5:
-                    signals.append({'type': '13D/G', 'ticker': ticker, 'title': title, 'link': link, 'stake': stake.group(1), 'filing_text': filing_text})
-    except Exception as e:
-        st.warning(f"SEC scrape failed: {e}")
-
-    # === 3. Insider Buys ===
-    try:
-        r = requests.get("https://finviz.com/insidertrading.ashx", headers=HEADERS)
-        soup = BeautifulSoup(r.text, 'html.parser')
-        rows = soup.select('table.body-table tr')[1:]
-        buys = {}
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) < 10: continue
-            ticker = cols[1].text.strip()
-            owner = cols[2].text.strip()
-            trans = cols[5].text.strip()
-            val = cols[8].text.strip().replace('$', '').replace(',', '')
-            raw_data['insiders'].append({'ticker': ticker, 'owner': owner, 'value': val})
-            if trans == 'Buy' and val:
-                try:
-                    val = float(val)
-                    if val >= 500000:
-                        if ticker not in buys: buys[ticker] = []
-                        buys[ticker].append({'owner': owner, 'value': f"${val:,.0f}"})
-                except: continue
-        for t, list_buys in buys.items():
-            if len(list_buys) >= 2:
-                signals.append({'type': 'Insider Cluster', 'ticker': t, 'insiders': list_buys, 'filing_text': ''})
-    except Exception as e:
-        st.warning(f"Insider scrape failed: {e}")
-
-    if _debug:
-        return signals, raw_data
-    return signals, None
-
-def cik_to_ticker(cik):
-    try:
-        data = requests.get("https://www.sec.gov/files/company_tickers.json", headers=HEADERS).json()
-        for v in data.values():
-            if str(v['cik_str']) == str(cik):
-                return v['ticker']
-    except: pass
-    return None
+    text, usage = grok.analyze_with_grok(filing_text, signal_type, ticker)
+    if usage and not usage['cached']:
+        st.markdown(f"<div class='token-info'>Tokens: {usage['prompt_tokens']} in + {usage['completion_tokens']} out = {usage['total_tokens']} (~${usage['cost']:.3f})</div>", unsafe_allow_html=True)
+    return text
+
+# === SCAN RESULTS (written by `python -m scanner`) ===
+@st.cache_resource
+def get_history():
+    return HistoryStore()
+
+@st.cache_data
+def load_scan(mtime):
+    return scanner.load_results()
+
+def scan_csv(signals):
+    import pandas as pd
+    return pd.DataFrame(signals).to_csv(index=False).encode()
+
+# === WARM START (once per server process) ===
+# Kicked off after the first page is drawn (the last scan is already read by
+# then): the peer index, on-disk market snapshots and the chart/data modules load
+# in the background, so the first chart, options or peer view doesn't pay for them.
+# Disk only – nothing here may reach the network.
+def _preload():
+    import plotly.graph_objects  # noqa: F401
+    from market_data import get_market_data
+    get_market_data().load()
+    from peers import get_peer_index
+    get_peer_index()
+
+@st.cache_resource(show_spinner=False)
+def warm_start():
+    threading.Thread(target=_preload, name='warm-start', daemon=True).start()
+    return True
 
 def get_stock_chart(ticker):
+    import plotly.graph_objects as go
+    from market_data import get_market_data
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")
+        hist = get_market_data().history(ticker, '5d')
         if hist.empty: return None
         fig = go.Figure(go.Candlestick(x=hist.index, open=hist['Open'], high=hist['High'], low=hist['Low'], close=hist['Close']))
         fig.update_layout(height=200, margin=dict(l=0,r=0,t=0,b=0), paper_bgcolor="#282a36", plot_bgcolor="#282a36", font_color="#f8f8f2")
         return fig
     except: return None
 
-# === STOCKPEERS ===
-@st.cache_data(ttl=300)
+# === STOCKPEERS (precomputed index – see peers.py) ===
 def get_peers(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        sector = info.get('sector', 'Unknown')
-        peers = [ticker] + [p for p in ['AAPL', 'MSFT', 'GOOGL', 'AMD', 'INTC'] if p != ticker][:4]
-        return peers, sector, info.get('industry', 'Unknown')
-    except:
-        return [ticker], 'Unknown', 'Unknown'
-
-@st.cache_data(ttl=300)
+    from peers import get_peer_index
+    index = get_peer_index()
+    nearest = index.nearest(ticker, PEER_COUNT)
+    p = index.get(ticker)
+    if not p or not p.sic:
+        note = "Not in the peer index – build it with `python -m peers build`."
+    elif not nearest:
+        note = "No other companies in this industry group."
+    elif not any(peer.market_cap for peer in nearest):
+        note = "Peers have no prices yet – run `python -m peers refresh`."
+    else:
+        note = None
+    return [ticker] + [peer.ticker for peer in nearest], index.sector(ticker) or 'Unknown', index.industry(ticker) or 'Unknown', note
+
+# metrics come from the index's scheduled bulk refresh; only the chart history is fetched (one batch)
 def fetch_peer_data(peers):
+    from market_data import get_market_data
+    from peers import get_peer_index
+    index = get_peer_index()
+    md = get_market_data()
+    md.prefetch(peers)
     data = {}
-    for p in peers:
-        stock = yf.Ticker(p)
-        hist = stock.history(period="1mo")
-        info = stock.info
-        data[p] = {
-            'history': hist,
-            'pe_ratio': info.get('trailingPE', 'N/A'),
-            'market_cap': info.get('marketCap', 'N/A'),
-            'volume': info.get('averageVolume', 'N/A')
+    for t in peers:
+        p = index.get(t)
+        data[t] = {
+            'history': md.history(t, '1mo'),
+            'pe_ratio': round(p.pe, 1) if p and p.pe else 'N/A',
+            'market_cap': p.market_cap if p and p.market_cap else 'N/A',
+            'volume': round(p.avg_volume) if p and p.avg_volume else 'N/A'
         }
     return data
 
-def display_peer_comparison(peers, sector):
-    st.sidebar.markdown(f"### {sector} Peers")
-    metrics = []
+def display_peer_comparison(peers, sector, industry='Unknown', note=None):
+    import pandas as pd
+    import plotly.graph_objects as go
+    st.sidebar.markdown(f"### {industry if industry != 'Unknown' else sector} Peers")
+    if sector != 'Unknown':
+        st.sidebar.caption(sector)
+    if note:
+        st.sidebar.caption(note)
+    rows = []
     for p in peers:
         d = st.session_state.peer_data.get(p, {})
-        metrics.append({
+        rows.append({
             'Ticker': p,
             'P/E': d.get('pe_ratio', 'N/A'),
             'Market Cap': f"${d.get('market_cap', 0):,.0f}" if isinstance(d.get('market_cap'), (int, float)) else 'N/A',
             'Avg Vol': f"{d.get('volume', 0):,}" if isinstance(d.get('volume'), (int, float)) else 'N/A'
         })
-    st.sidebar.dataframe(pd.DataFrame(metrics), use_container_width=True)
+    st.sidebar.dataframe(pd.DataFrame(rows), use_container_width=True)
     fig = go.Figure()
     for p in peers:
         hist = st.session_state.peer_data.get(p, {}).get('history', pd.DataFrame())
@@ -287,35 +175,16 @@ def display_peer_comparison(peers, sector):
     fig.update_layout(title="1-Month Performance", height=400, paper_bgcolor="#282a36", plot_bgcolor="#282a36", font_color="#f8f8f2")
     st.sidebar.plotly_chart(fig, use_container_width=True)
 
-# === OPTIONS STRATEGY ===
-@st.cache_data(ttl=300)
+# === OPTIONS STRATEGY (top pick + ranked alternatives from the screener) ===
 def get_options_strategy(ticker):
+    from options_screener import screen as screen_options, to_card
     try:
-        stock = yf.Ticker(ticker)
-        price = stock.history(period="1d")['Close'].iloc[-1]
-        if len(stock.options) < 2:
-            return None
-        opts = stock.option_chain(stock.options[1])
-        calls = opts.calls
-        if len(calls) < 2:
+        ranked = screen_options(ticker)
+        if ranked.empty:
             return None
-        atm_call = calls.iloc[(calls['strike'] - price).abs().argsort()[:1]]
-        otm_call = calls[calls['strike'] > atm_call['strike'].iloc[0]].iloc[0]
-        debit = atm_call['lastPrice'].iloc[0] - otm_call['lastPrice'].iloc[0]
-        breakeven = atm_call['strike'].iloc[0] + debit
-        max_profit = (otm_call['strike'].iloc[0] - atm_call['strike'].iloc[0]) - debit
-        expiry = stock.options[1]
-        return {
-            'type': 'Bull Call Spread',
-            'buy': f"Buy {ticker} ${atm_call['strike'].iloc[0]} Call",
-            'sell': f"Sell {ticker} ${otm_call['strike'].iloc[0]} Call",
-            'expiry': expiry,
-            'debit': f"${debit:.2f}",
-            'breakeven': f"${breakeven:.2f}",
-            'max_profit': f"${max_profit:.2f}",
-            'risk': f"${debit * 100:.0f}",
-            'instructions': f"1. Open Wealthsimple → Search `{ticker}`\n2. Tap **Options** → Select **{expiry}**\n3. Buy to Open → `${atm_call['strike'].iloc[0]}` Call\n4. Sell to Open → `${otm_call['strike'].iloc[0]}` Call\n5. Confirm spread"
-        }
+        strategy = to_card(ranked.iloc[0])
+        strategy['ranked'] = ranked
+        return strategy
     except:
         return None
 
@@ -332,16 +201,21 @@ with st.sidebar:
     st.header("Controls")
     
     if st.button("SCAN NOW", type="primary"):
-        st.session_state.scan_triggered = True
+        scanner.request_scan()
+        st.toast("Scan requested – results appear when the scanner finishes")
 
     auto = st.checkbox("Auto-refresh (5 min)")
-    show_charts = st.checkbox("Show mini-charts", value=True)
+    if not scanner.is_alive():
+        st.warning("Scanner offline – start it with `python -m scanner`")
+    show_charts = st.checkbox("Show mini-charts", value=True, key='show_charts')
     debug = st.checkbox("Debug: Show Raw Data", value=False)
+    diagnostics = st.checkbox("Diagnostics: Timings & Metrics", value=False)
     
     st.markdown("---")
     st.markdown("**Grok Token Balance**")
-    remaining = max(0, MONTHLY_TOKEN_LIMIT - st.session_state.SESSION_TOKENS)
-    st.metric("Remaining", f"{remaining:,}", delta=f"-{st.session_state.SESSION_TOKENS:,} used")
+    used = grok.get_store().used_this_month()
+    remaining = max(0, MONTHLY_TOKEN_LIMIT - used)
+    st.metric("Remaining", f"{remaining:,}", delta=f"-{used:,} used this month")
     
     if st.button("Clear Cache"):
         st.cache_data.clear()
@@ -350,126 +224,203 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("**TEST ALERTS**")
     if st.button("SEND TEST TELEGRAM ALERT"):
-        success = send_telegram("<b>TEST SUCCESS</b>\n@EastofElgin | Scanner Active")
-        if success:
-            st.success("Test message sent to Telegram!")
+        from alerts import get_dispatcher
+        dispatcher = get_dispatcher()
+        if not dispatcher.enabled:
+            st.warning("Telegram alerts are disabled – set TELEGRAM_TOKEN & TELEGRAM_CHAT_ID.")
         else:
-            st.error("Failed to send. Check bot token & chat ID.")
-
-# === SCAN TRIGGER ===
-scan_now = st.session_state.get('scan_triggered', False) or auto
-if scan_now:
-    st.session_state.scan_triggered = False
-    with st.spinner("Scanning for M&A signals..."):
-        signals, raw_data = get_signals(_debug=debug)
-        scan_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        if signals:
-            st.session_state.SCAN_HISTORY.append({'time': scan_time, 'count': len(signals), 'signals': signals})
-            st.success(f"**{len(signals)} SIGNALS FOUND**")
-            
-            for sig in signals:
-                # === ALERTS ===
-                if sig['type'] in ['SEC 8-K', '13D/G', 'Insider Cluster']:
-                    grok_summary = ""
-                    if sig.get('filing_text'):
-                        grok_summary = analyze_with_grok(sig['filing_text'], sig['type'], sig['ticker'])
-                    msg = f"<b>{sig['ticker']}: {sig['type']}</b>\n{sig['title'][:100]}...\n<a href='{sig['link']}'>View</a>\n{grok_summary}"
-                    send_telegram(msg)
+            dispatcher.submit("<b>TEST SUCCESS</b>\n@EastofElgin | Scanner Active")
+            st.success("Test message queued for Telegram!")
+
+# === PER-CARD ACTIONS ===
+# Grok and options only run when asked for, and as a fragment only this card reruns
+GROK_TYPES = {'SEC 8-K': '8-K', '13D/G': '13D'}
+SIGNALS_PAGE_SIZE = 10
+
+@st.fragment
+def signal_actions(sig, i):
+    c1, c2, c3 = st.columns(3)
+    grok_clicked = sig['type'] in GROK_TYPES and c1.button("Analyze with Grok", key=f"grok_{i}")
+    show_options = c2.toggle("Options strategy", key=f"options_{i}")
+    if c3.button("View Peers", key=f"peers_{i}"):
+        st.session_state.selected_ticker = sig['ticker']
+        st.rerun()
+    if grok_clicked:
+        analysis = sig.get('grok') or analyze_with_grok(sig['filing_text'], GROK_TYPES[sig['type']], sig['ticker'])
+        st.markdown(f"<div class='grok-analysis'><strong>Grok AI:</strong><br>{analysis}</div>", unsafe_allow_html=True)
+
+    # === OPTIONS STRATEGY ===
+    if show_options:
+        with st.spinner("Screening options…"):
+            strategy = get_options_strategy(sig['ticker'])
+        if not strategy:
+            st.caption("No liquid options strategy found.")
+            return
+        st.markdown(f"**{strategy['type']} Strategy**")
+        st.markdown(f"<div class='option-card'>", unsafe_allow_html=True)
+        st.markdown(f"**Buy:** {strategy['buy']}<br>**Sell:** {strategy['sell']}<br>**Expiry:** {strategy['expiry']}<br>**Cost:** {strategy['debit']}<br>**Breakeven:** {strategy['breakeven']}<br>**{strategy['max_profit_label']}:** {strategy['max_profit']}<br>**Risk:** {strategy['risk']}<br>**Reward/Risk:** {strategy['reward_risk']}", unsafe_allow_html=True)
+        st.markdown(f"**Wealthsimple Steps:**<pre>{strategy['instructions']}</pre>", unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+        st.dataframe(strategy['ranked'][['strategy', 'expiry', 'long_strike', 'short_strike', 'cost', 'breakeven', 'reward_risk', 'pop', 'liquidity', 'score']].round(2), use_container_width=True)
+
+# === SCAN RESULTS (READ-ONLY VIEW OF THE SCANNER STORE) ===
+@st.fragment(run_every=SCAN_INTERVAL if auto else None)
+def results_view(show_charts, debug):
+    result = load_scan(scanner.results_mtime())
+    if not result:
+        st.info("**No scan results yet.** Start the scanner with `python -m scanner`.")
+        return
+    signals, raw_data, scan_time = result['signals'], result.get('raw_data'), result['time']
+    st.caption(f"Last scan: {scan_time}")
+    for msg in result.get('errors', {}).values():
+        st.warning(msg)
+    is_new = st.session_state.get('last_scan_time') != scan_time
+    st.session_state.last_scan_time = scan_time
+
+    if signals:
+        carried = result.get('carried', 0)
+        st.success(f"**{len(signals) - carried} SIGNALS FOUND**" + (f" · {carried} earlier SEC filings from the last {RECENT_SIGNAL_HOURS}h" if carried else ""))
+        # === ALERTS (sent by the scanner; browser notification only) ===
+        if is_new:
+            for sig in signals[:len(signals) - carried]:
+                if sig['type'] in scanner.ALERT_TYPES:
                     st.markdown(f'<script>showNotification("{sig["ticker"]}", "{sig["type"]} Signal");</script>', unsafe_allow_html=True)
 
-                # === DISPLAY CARD ===
-                card_class = f"signal-card signal-{sig['type'].lower().replace(' ', '-')}"
-                with st.container():
-                    col1, col2, col3 = st.columns([1, 3, 1])
-                    with col1:
-                        st.markdown(f"**{sig['ticker']}**")
-                        st.markdown(f"<div class='{card_class}'><small><b>{sig['type']}</b></small></div>", unsafe_allow_html=True)
-                    with col2:
-                        if sig['type'] == 'M&A News':
-                            st.markdown(f"**{sig['title'][:80]}...**")
-                            if sig['link']: st.markdown(f"[Read more]({sig['link']})")
-                        elif sig['type'] == 'SEC 8-K':
-                            st.markdown(f"**SEC 8-K Filed**")
-                            st.markdown(f"[View Filing]({sig['link']})")
-                            if st.button(f"Analyze with Grok", key=f"grok_8k_{sig['ticker']}"):
-                                analysis = analyze_with_grok(sig['filing_text'], '8-K', sig['ticker'])
-                                st.markdown(f"<div class='grok-analysis'><strong>Grok AI:</strong><br>{analysis}</div>", unsafe_allow_html=True)
-                        elif sig['type'] == '13D/G':
-                            st.markdown(f"**{sig.get('stake', 'N/A')}% Stake**")
-                            st.markdown(f"[View 13D]({sig['link']})")
-                            if st.button(f"Analyze with Grok", key=f"grok_13d_{sig['ticker']}"):
-                                analysis = analyze_with_grok(sig['filing_text'], '13D', sig['ticker'])
-                                st.markdown(f"<div class='grok-analysis'><strong>Grok AI:</strong><br>{analysis}</div>", unsafe_allow_html=True)
-                        elif sig['type'] == 'Insider Cluster':
-                            st.markdown("**Multiple Insiders Buying**")
-                            for buy in sig['insiders']:
-                                st.markdown(f"• {buy['owner']} — {buy['value']}")
-                        if st.button(f"View Peers", key=f"peers_{sig['ticker']}"):
-                            st.session_state.selected_ticker = sig['ticker']
-                            st.rerun()
-
-                        # === OPTIONS STRATEGY ===
-                        strategy = get_options_strategy(sig['ticker'])
-                        if strategy:
-                            with st.expander(f"**{strategy['type']} Strategy**"):
-                                st.markdown(f"<div class='option-card'>", unsafe_allow_html=True)
-                                st.markdown(f"**Buy:** {strategy['buy']}<br>**Sell:** {strategy['sell']}<br>**Expiry:** {strategy['expiry']}<br>**Cost:** {strategy['debit']}<br>**Breakeven:** {strategy['breakeven']}<br>**Max Profit:** {strategy['max_profit']}<br>**Risk:** {strategy['risk']}", unsafe_allow_html=True)
-                                st.markdown(f"**Wealthsimple Steps:**<pre>{strategy['instructions']}</pre>", unsafe_allow_html=True)
-                                st.markdown("</div>", unsafe_allow_html=True)
-                    with col3:
-                        if show_charts:
-                            chart = get_stock_chart(sig['ticker'])
-                            if chart: st.plotly_chart(chart, use_container_width=True)
-
-            # === CSV Download ===
-            df = pd.DataFrame(signals)
-            st.download_button("Download This Scan", df.to_csv(index=False).encode(), f"scan_{scan_time}.csv", "text/csv")
-
-        else:
-            st.info("**No high-conviction M&A signals right now.**")
-
-        # === DEBUG MODE ===
-        if debug and raw_data:
-            with st.expander("DEBUG: Raw Scraped Data", expanded=True):
-                st.subheader("News Headlines")
-                st.write(raw_data['news'][:20])
-                st.subheader("SEC Filings")
-                st.json(raw_data['sec'][:10])
-                st.subheader("Insider Buys")
-                st.json(raw_data['insiders'][:10])
-
-# === SCAN HISTORY PANEL ===
-if st.session_state.SCAN_HISTORY:
-    with st.expander(f"Scan History ({len(st.session_state.SCAN_HISTORY)} scans)", expanded=False):
-        for entry in reversed(st.session_state.SCAN_HISTORY):
+        # === PAGINATION: only the visible page is rendered / enriched ===
+        pages = (len(signals) - 1) // SIGNALS_PAGE_SIZE + 1
+        if st.session_state.get('signal_page', 1) > pages:
+            st.session_state.signal_page = 1
+        page = st.number_input("Signals page", min_value=1, max_value=pages, step=1, key='signal_page') if pages > 1 else 1
+        first = (page - 1) * SIGNALS_PAGE_SIZE
+        chart_slots = []
+
+        # cards come straight from the scan result – no network before they're drawn
+        for i, sig in enumerate(signals[first:first + SIGNALS_PAGE_SIZE], first):
+            card_class = f"signal-card signal-{sig['type'].lower().replace(' ', '-')}"
+            with st.container():
+                col1, col2, col3 = st.columns([1, 3, 1])
+                with col1:
+                    st.markdown(f"**{sig['ticker']}**")
+                    st.markdown(f"<div class='{card_class}'><small><b>{sig['type']}</b></small></div>", unsafe_allow_html=True)
+                    if sig.get('scan_time'): st.caption(sig['scan_time'])
+                with col2:
+                    if sig['type'] == 'M&A News':
+                        st.markdown(f"**{sig['title'][:80]}...**")
+                        if sig['link']: st.markdown(f"[Read more]({sig['link']})")
+                    elif sig['type'] == 'SEC 8-K':
+                        st.markdown(f"**SEC 8-K Filed**")
+                        st.markdown(f"[View Filing]({sig['link']})")
+                    elif sig['type'] == '13D/G':
+                        st.markdown(f"**{sig.get('stake', 'N/A')}% Stake**")
+                        st.markdown(f"[View 13D]({sig['link']})")
+                    elif sig['type'] == 'Insider Cluster':
+                        st.markdown("**Multiple Insiders Buying**")
+                        if sig.get('window'):
+                            st.caption(f"{sig['window'][0]} → {sig['window'][1]}")
+                        for buy in sig['insiders']:
+                            st.markdown(f"• {buy['owner']} — {buy['value']}" + (f" ({buy['date']})" if buy.get('date') else ""))
+                    signal_actions(sig, i)
+                with col3:
+                    if show_charts:
+                        chart_slots.append((i, sig['ticker'], st.empty()))
+
+        # === MINI-CHARTS: filled in after every visible card is on screen ===
+        if chart_slots:
+            from market_data import get_market_data
+            get_market_data().prefetch({t for _, t, _ in chart_slots})
+            for i, ticker, slot in chart_slots:
+                chart = get_stock_chart(ticker)
+                if chart: slot.plotly_chart(chart, use_container_width=True, key=f"chart_{i}")
+
+        # === CSV Download ===
+        st.download_button("Download This Scan", lambda: scan_csv(signals), f"scan_{scan_time}.csv", "text/csv")
+
+    else:
+        st.info("**No high-conviction M&A signals right now.**")
+
+    # === DEBUG MODE ===
+    if debug and raw_data:
+        with st.expander("DEBUG: Raw Scraped Data", expanded=True):
+            st.subheader("News Headlines")
+            st.write(raw_data['news'][:20])
+            st.subheader("SEC Filings")
+            st.json(raw_data['sec'][:10])
+            st.subheader("Insider Buys")
+            st.json(raw_data['insiders'][:10])
+
+results_view(show_charts, debug)
+
+# === DIAGNOSTICS (scanner's exported snapshot + this page's own registry) ===
+def metrics_tables(snap, key):
+    import pandas as pd
+    buckets = snap['buckets']
+    hists = [{
+        'metric': h['name'],
+        'labels': ', '.join(f"{k}={v}" for k, v in sorted(h['labels'].items())),
+        'count': h['count'],
+        'mean ms': round(h['sum'] / h['count'] * 1e3, 1) if h['count'] else None,
+        'p50 ≤ ms': metrics.quantile(h, buckets, 0.5) * 1e3 if h['count'] else None,
+        'p95 ≤ ms': metrics.quantile(h, buckets, 0.95) * 1e3 if h['count'] else None,
+    } for h in sorted(snap['histograms'], key=lambda h: (h['name'], sorted(h['labels'].items())))]
+    values = [{
+        'metric': c['name'],
+        'labels': ', '.join(f"{k}={v}" for k, v in sorted(c['labels'].items())),
+        'value': c['value'],
+    } for c in sorted(snap['counters'] + snap['gauges'], key=lambda c: (c['name'], sorted(c['labels'].items())))]
+    if hists:
+        st.dataframe(pd.DataFrame(hists), use_container_width=True, hide_index=True)
+    if values:
+        st.dataframe(pd.DataFrame(values), use_container_width=True, hide_index=True)
+    c1, c2 = st.columns(2)
+    c1.download_button("Prometheus text", metrics.to_prometheus(snap), "metrics.prom", "text/plain", key=f"prom_{key}")
+    c2.download_button("JSON", json.dumps(snap), "metrics.json", "application/json", key=f"json_{key}")
+
+if diagnostics:
+    with st.expander("Diagnostics", expanded=True):
+        import pandas as pd
+        last = load_scan(scanner.results_mtime())
+        if last and last.get('stages'):
+            st.markdown(f"**Last scan** ({last['time']}) — {last.get('duration', 0):.2f}s total")
+            st.bar_chart(pd.Series({**{f"stage: {k}": v for k, v in last['stages'].items()},
+                                    **{f"source: {k}": v for k, v in last.get('timings', {}).items()}}, name='seconds'))
+        scanner_tab, page_tab = st.tabs(["Scanner process", "This page"])
+        with scanner_tab:
+            snap = metrics.load_snapshot()
+            if snap:
+                st.caption(f"Exported {datetime.fromtimestamp(snap['ts']):%Y-%m-%d %H:%M:%S} (pid {snap['pid']})")
+                metrics_tables(snap, 'scanner')
+            else:
+                st.info("No metrics exported yet – they're written after each scan.")
+        with page_tab:
+            metrics_tables(metrics.REGISTRY.snapshot(), 'page')
+
+# === SCAN HISTORY PANEL (paged from the scanner's history store) ===
+HISTORY_PAGE_SIZE = 10
+history = get_history()
+total_scans = history.count_scans()
+if total_scans:
+    with st.expander(f"Scan History ({total_scans} scans)", expanded=False):
+        pages = (total_scans - 1) // HISTORY_PAGE_SIZE + 1
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        entries = history.recent_scans(HISTORY_PAGE_SIZE, (page - 1) * HISTORY_PAGE_SIZE)
+        entry_signals = history.scan_signals([e['id'] for e in entries])
+        for entry in entries:
             with st.container():
                 st.markdown(f"<div class='history-item'><b>{entry['time']}</b> — {entry['count']} signals</div>", unsafe_allow_html=True)
-                for sig in entry['signals']:
-                    st.markdown(f"• **{sig['ticker']}** — {sig['type']}: {sig['title'][:60]}...")
-        # === Export Full History ===
-        all_signals = []
-        for entry in st.session_state.SCAN_HISTORY:
-            for sig in entry['signals']:
-                sig['scan_time'] = entry['time']
-                all_signals.append(sig)
-        if all_signals:
-            df_hist = pd.DataFrame(all_signals)
-            st.download_button("Export Full History", df_hist.to_csv(index=False).encode(), "full_scan_history.csv", "text/csv")
+                for sig in entry_signals[entry['id']]:
+                    st.markdown(f"• **{sig['ticker']}** — {sig['type']}: {sig.get('title', '')[:60]}...")
+        # === Export Full History (streamed from the store on click) ===
+        st.download_button("Export Full History", history.export_csv, "full_scan_history.csv", "text/csv")
         if st.button("Clear History"):
-            st.session_state.SCAN_HISTORY = []
+            history.clear()
             st.rerun()
 
 # === PEER VIEW IN SIDEBAR ===
 if 'selected_ticker' in st.session_state:
     ticker = st.session_state.selected_ticker
-    peers, sector, _ = get_peers(ticker)
+    peers, sector, industry, note = get_peers(ticker)
     st.session_state.peer_data = fetch_peer_data(peers)
-    display_peer_comparison(peers, sector)
-
-if auto:
-    time.sleep(300)
-    st.rerun()
+    display_peer_comparison(peers, sector, industry, note)
 
 # === FOOTER ===
 st.markdown(f"""
@@ -477,3 +428,5 @@ st.markdown(f"""
     M&A Scanner | Not financial advice
 </div>
 """, unsafe_allow_html=True)
+
+warm_start()
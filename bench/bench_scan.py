@@ -0,0 +1,216 @@
+# bench_scan.py – END-TO-END SCAN BENCHMARK, FULLY OFFLINE
+#   python bench/bench_scan.py                                  # synthetic fixtures, in-process replay
+#   python bench/bench_scan.py --mode server --latency 0.05 --jitter 0.05 --failure-rate 0.05
+#   python bench/bench_scan.py --fixtures fixtures/live --scans 5   # a cassette from SCANNER_RECORD
+# Each scan runs sources → classification → filing enrichment → Grok → alerts
+# against a throwaway DATA_DIR; scan 1 is cold, later scans see warm caches.
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STAGES = ('collect', 'enrich', 'grok', 'alerts')
+GROK_URL = "https://api.x.ai/v1/chat/completions"
+SEC_CURRENT_URL = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type={form}&company=&dateb=&owner=include&start={start}&count={count}&output=atom"
+
+
+# === SYNTHETIC FIXTURES ===
+# A deterministic stand-in for one live scan: ticker map, Yahoo news page,
+# one EDGAR atom page (+ index page and document per matching filing),
+# the finviz insider table, and canned Grok / Telegram replies.
+def _symbol(n):
+    letters = ''
+    n += 26 * 27
+    while n:
+        n, r = divmod(n, 26)
+        letters = chr(65 + r) + letters
+    return letters[-4:]
+
+
+def build_synthetic(root, n_tickers=3000, n_news=80, n_filings=100, n_insiders=200, n_form4=40):
+    from replay import Cassette
+    cassette = Cassette(root)
+    json_hdr = {'Content-Type': 'application/json'}
+    html_hdr = {'Content-Type': 'text/html; charset=utf-8'}
+    # sec.gov sends validators, so unchanged EDGAR pages revalidate as 304s on later scans
+    def sec_hdr(ctype, tag):
+        return {'Content-Type': ctype, 'ETag': f'"{tag}"'}
+    tickers = [(1000 + i, _symbol(i)) for i in range(n_tickers)]
+    cassette.add('GET', "https://www.sec.gov/files/company_tickers.json", 200, dict(json_hdr, ETag='"bench"'), json.dumps(
+        {str(i): {'cik_str': cik, 'ticker': t, 'title': f"{t} Corp"} for i, (cik, t) in enumerate(tickers)}).encode())
+
+    news = []
+    for i in range(n_news):
+        t = tickers[i * 7 % n_tickers][1]
+        title = f"{t} agrees to acquire rival in $2B deal" if i % 5 == 0 else f"Markets wrap: {t} shares edge higher"
+        news.append(f'<li><a href="/news/story-{i}.html"><h3 class="Mb(5px)">{title}</h3></a><p>{"filler " * 40}</p></li>')
+    cassette.add('GET', "https://finance.yahoo.com/news/", 200, html_hdr,
+                 f"<html><head><script>{'x' * 20000}</script></head><body><ul>{''.join(news)}</ul></body></html>".encode())
+
+    entries = []
+    now = time.strftime('%Y-%m-%dT%H:%M:%S-04:00')
+    for i in range(n_filings):
+        cik, t = tickers[i * 13 % n_tickers]
+        acc = f"{cik:010d}-24-{i:06d}"
+        base = f"https://www.sec.gov/Archives/edgar/data/{cik}/{acc.replace('-', '')}"
+        link = f"{base}/{acc}-index.htm"
+        if i % 4 == 0:
+            form, title, items = '8-K', f"8-K - {t} Merger Sub Inc ({cik:010d}) (Filer)", ('1.01', '2.01')
+        elif i % 4 == 1:
+            form, title, items = 'SC 13D', f"SC 13D - {t} Corp ({cik:010d}) (Subject) 7.5%", ('4',)
+        else:
+            form, title, items = '10-Q', f"10-Q - {t} Corp ({cik:010d}) (Filer)", ()
+        entries.append(f"<entry><title>{title}</title><link rel=\"alternate\" type=\"text/html\" href=\"{link}\"/>"
+                       f"<summary type=\"html\">Filed: 2024-01-01 AccNo: {acc}</summary><updated>{now}</updated>"
+                       f"<id>urn:tag:sec.gov,2008:accession-number={acc}</id></entry>")
+        if not items:
+            continue
+        cassette.add('GET', link, 200, sec_hdr(html_hdr['Content-Type'], acc), (
+            '<html><body><table class="tableFile"><tr><th>Seq</th><th>Description</th><th>Document</th><th>Type</th></tr>'
+            f'<tr><td>1</td><td>{form}</td><td><a href="/ix?doc=/Archives/edgar/data/{cik}/{acc.replace("-", "")}/doc.htm">doc.htm</a></td><td>{form}</td></tr>'
+            '</table></body></html>').encode())
+        body = ''.join(f"<div>Item {item} Section heading</div>" + "<p>The parties entered into a definitive agreement and plan of merger.</p>" * 30
+                       for item in items + ('9.01',))
+        cassette.add('GET', f"{base}/doc.htm", 200, html_hdr, f"<html><body>{body}<p>SIGNATURES</p>{'<p>exhibit</p>' * 2000}</body></html>".encode())
+    cassette.add('GET', SEC_CURRENT_URL.format(form='', start=0, count=100), 200, sec_hdr('application/atom+xml', 'current'),
+                 f'<?xml version="1.0" encoding="ISO-8859-1" ?><feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}</feed>'.encode())
+
+    rows = []
+    today = time.strftime("%b %d '%y")
+    for i in range(n_insiders):
+        t = tickers[i // 3 * 11 % n_tickers][1]
+        value = 750000 if i % 6 < 2 else 25000
+        cells = [t, t, f"Insider {i}", 'Director', today, 'Buy' if i % 2 == 0 or value > 500000 else 'Sale', '10.00', '100', f"{value:,}", '1000', 'Jan 02']
+        rows.append('<tr>' + ''.join(f'<td><a href="#">{c}</a></td>' for c in cells) + '</tr>')
+    cassette.add('GET', "https://finviz.com/insidertrading.ashx", 200, html_hdr,
+                 f"<html><body><table class=\"body-table\"><tr><td>header</td></tr>{''.join(rows)}</table></body></html>".encode())
+
+    # Form 4 feed: pairs of purchases by different insiders of the same issuer
+    entries = []
+    for i in range(n_form4):
+        cik, t = tickers[(i // 2) * 17 % n_tickers]
+        acc = f"{9000 + i:010d}-24-{i:06d}"
+        base = f"https://www.sec.gov/Archives/edgar/data/{cik}/{acc.replace('-', '')}"
+        link = f"{base}/{acc}-index.htm"
+        entries.append(f"<entry><title>4 - Insider {i} ({9000 + i:010d}) (Reporting)</title><link rel=\"alternate\" type=\"text/html\" href=\"{link}\"/>"
+                       f"<updated>{now}</updated><id>urn:tag:sec.gov,2008:accession-number={acc}</id></entry>")
+        cassette.add('GET', link, 200, sec_hdr(html_hdr['Content-Type'], acc), (
+            '<html><body><table class="tableFile"><tr><th>Seq</th><th>Description</th><th>Document</th><th>Type</th></tr>'
+            f'<tr><td>1</td><td>4</td><td><a href="{base}/xslF345X05/form4.xml">form4.html</a></td><td>4</td></tr>'
+            '</table></body></html>').encode())
+        cassette.add('GET', f"{base}/form4.xml", 200, {'Content-Type': 'text/xml'}, (
+            f"<ownershipDocument><issuer><issuerTradingSymbol>{t}</issuerTradingSymbol></issuer>"
+            f"<reportingOwner><reportingOwnerId><rptOwnerName>Insider {i}</rptOwnerName></reportingOwnerId></reportingOwner>"
+            f"<nonDerivativeTable><nonDerivativeTransaction><transactionDate><value>{time.strftime('%Y-%m-%d')}</value></transactionDate>"
+            "<transactionCoding><transactionCode>P</transactionCode></transactionCoding><transactionAmounts>"
+            "<transactionShares><value>20000</value></transactionShares><transactionPricePerShare><value>40.00</value></transactionPricePerShare>"
+            "</transactionAmounts></nonDerivativeTransaction></nonDerivativeTable></ownershipDocument>").encode())
+    cassette.add('GET', SEC_CURRENT_URL.format(form='4', start=0, count=100), 200, sec_hdr('application/atom+xml', 'current-4'),
+                 f'<?xml version="1.0" encoding="ISO-8859-1" ?><feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}</feed>'.encode())
+
+    cassette.add('POST', GROK_URL, 200, json_hdr, json.dumps({
+        'choices': [{'message': {'content': "- Definitive merger agreement\n- Cash consideration\n- Closing risk: regulatory"}}],
+        'usage': {'prompt_tokens': 900, 'completion_tokens': 120}}).encode())
+    cassette.add('POST', "https://api.telegram.org/botbench/sendMessage", 200, json_hdr, b'{"ok": true}')
+    return root
+
+
+# === RUN ===
+def _rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end scan benchmark on recorded or synthetic fixtures")
+    parser.add_argument('--fixtures', help="cassette directory (default: generate synthetic fixtures)")
+    parser.add_argument('--mode', choices=('adapter', 'server'), default='adapter',
+                        help="adapter: in-process replay; server: local HTTP stand-in with latency/failures")
+    parser.add_argument('--scans', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help="server mode: seconds added per response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="server mode: extra uniform random delay")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="server mode: share of 503s / dropped connections")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--rate-limit', action='store_true', help="keep the per-host rate limits (SEC: 10 req/s)")
+    parser.add_argument('--memory', action='store_true', help="trace Python allocations per scan (slower)")
+    parser.add_argument('--json', action='store_true', help="print one JSON line per scan instead of a table")
+    args = parser.parse_args(argv)
+
+    # everything the scanner persists goes to a throwaway directory
+    work = tempfile.mkdtemp(prefix='bench_scan_')
+    os.environ.update(SCANNER_DATA_DIR=os.path.join(work, 'data'), SCANNER_CONTACT='bench@example.com', XAI_API_KEY='bench',
+                      TELEGRAM_TOKEN='bench', TELEGRAM_CHAT_ID='0')
+    # unthrottled by default so the numbers measure the pipeline, not the SEC budget
+    os.environ['SEC_RATE_LIMIT'] = os.getenv('SEC_RATE_LIMIT', '10') if args.rate_limit else '0'
+    for var in ('SCANNER_RECORD', 'SCANNER_REPLAY'):
+        os.environ.pop(var, None)
+    fixtures = args.fixtures or build_synthetic(os.path.join(work, 'fixtures'))
+
+    import replay
+    import scanner
+    from alerts import get_dispatcher
+    from http_client import POOL_SIZE, get_session
+
+    cassette = replay.Cassette(fixtures)
+    session = get_session()
+    server = None
+    if args.mode == 'server':
+        server = replay.FixtureServer(cassette, args.latency, args.jitter, args.failure_rate, seed=args.seed).start()
+        replay.install(session, replay.ForwardingAdapter(server.url, pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+        counts = server.counts
+    else:
+        counts = replay.install(session, replay.ReplayAdapter(cassette)).counts
+
+    if not args.json:
+        print(f"fixtures: {fixtures} ({len(cassette)} responses), mode: {args.mode}")
+        print(f"{'scan':>4} {'wall':>8} " + ' '.join(f"{s:>8}" for s in STAGES) + f" {'flush':>8} {'reqs':>5} {'signals':>7} {'errors':>6} {'peak MB':>8}")
+    try:
+        for n in range(1, args.scans + 1):
+            before = Counter(counts)
+            if args.memory:
+                tracemalloc.start()
+            t0 = time.perf_counter()
+            result = scanner.run_scan()
+            wall = time.perf_counter() - t0
+            # Telegram delivery is asynchronous; time draining the queue separately
+            t1 = time.perf_counter()
+            get_dispatcher().flush()
+            flush = time.perf_counter() - t1
+            peak = tracemalloc.get_traced_memory()[1] / 1e6 if args.memory else None
+            if args.memory:
+                tracemalloc.stop()
+            reqs = Counter(counts)
+            reqs.subtract(before)
+            reqs = {host: c for host, c in reqs.items() if c}
+            row = {
+                'scan': n, 'wall': wall, 'stages': result['stages'], 'sources': result['timings'], 'flush': flush,
+                'requests': reqs, 'signals': len(result['signals']), 'errors': result['errors'],
+                'peak_traced_mb': peak, 'max_rss_mb': _rss_mb(),
+            }
+            if args.json:
+                print(json.dumps(row))
+                continue
+            print(f"{n:>4} {wall * 1e3:6.0f}ms " + ' '.join(f"{result['stages'].get(s, 0) * 1e3:6.0f}ms" for s in STAGES)
+                  + f" {flush * 1e3:6.0f}ms {sum(reqs.values()):>5} {row['signals']:>7} {len(result['errors']):>6}"
+                  + f" {peak if peak is not None else row['max_rss_mb']:>8.1f}")
+            for host, c in sorted(reqs.items()):
+                print(f"{'':>14}{host:<28} {c:>4} requests")
+    finally:
+        if server:
+            server.stop()
+    if not args.json:
+        print("peak MB = traced Python allocations with --memory, else process max RSS")
+        if args.mode == 'server' and server.failures:
+            print(f"injected failures: {dict(server.failures)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# bench_startup.py – COLD-START TIME OF THE STREAMLIT PAGE (SHELL + LAST SCAN)
+#   python bench/bench_startup.py                    # this checkout, 5 fresh processes
+#   python bench/bench_startup.py --charts           # also draw mini-charts (pulls in yfinance/plotly)
+#   git worktree add /tmp/base <rev> && python bench/bench_startup.py --app /tmp/base/app.py   # compare
+# Every repeat is a fresh interpreter running the page once via streamlit's
+# AppTest against a synthetic last scan; no network is needed.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('pandas', 'plotly', 'yfinance', 'bs4', 'feedparser', 'requests', 'numpy')
+TYPES = ('M&A News', 'SEC 8-K', '13D/G', 'Insider Cluster')
+
+
+def write_scan(data_dir, n):
+    os.makedirs(data_dir, exist_ok=True)
+    signals = []
+    for i in range(n):
+        sig = {'type': TYPES[i % 4], 'ticker': f"T{i:03d}", 'title': f"Synthetic signal {i} merger agreement",
+               'link': f"https://example.com/{i}", 'filing_text': ''}
+        if sig['type'] == 'Insider Cluster':
+            sig['insiders'] = [{'owner': 'Insider A', 'value': '$750,000'}, {'owner': 'Insider B', 'value': '$900,000'}]
+        if sig['type'] == '13D/G':
+            sig['stake'] = '7.5'
+        signals.append(sig)
+    with open(os.path.join(data_dir, 'latest_scan.json'), 'w') as f:
+        json.dump({'time': time.strftime("%Y-%m-%d %H:%M:%S"), 'signals': signals, 'raw_data': {}, 'errors': {},
+                   'timings': {}, 'stages': {}, 'tokens': 0, 'duration': 0}, f)
+
+
+# === CHILD: one cold start ===
+def child(app, charts):
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t1 = time.perf_counter()
+    at = AppTest.from_file(app, default_timeout=300)
+    at.session_state['show_charts'] = charts
+    at.run()
+    t2 = time.perf_counter()
+    print(json.dumps({
+        'streamlit_import': t1 - t0,
+        'first_run': t2 - t1,
+        'cards': sum(1 for m in at.markdown if "class='signal-card" in m.value),
+        'errors': [e.message for e in at.exception],
+        'heavy': [m for m in HEAVY if m in sys.modules],
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit cold-start benchmark")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--signals', type=int, default=40, help="signals in the synthetic last scan")
+    parser.add_argument('--charts', action='store_true', help="leave mini-charts on (offline fetches fail fast)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child(args.app, args.charts)
+
+    data_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    write_scan(data_dir, args.signals)
+    env = dict(os.environ, SCANNER_DATA_DIR=data_dir, ALPHA_VANTAGE_API_KEY='bench', XAI_API_KEY='bench',
+               TELEGRAM_TOKEN='bench', TELEGRAM_CHAT_ID='0', CIK_REFRESH_INTERVAL=str(10 ** 9))
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--app', os.path.abspath(args.app)] + (['--charts'] if args.charts else [])
+    runs = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        out = subprocess.run(cmd, env=env, cwd=os.path.dirname(os.path.abspath(args.app)), capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+        lines = [line for line in out.stdout.splitlines() if line.startswith('{')]
+        if out.returncode or not lines:
+            sys.exit(f"child failed:\n{out.stderr[-2000:]}")
+        runs.append(dict(json.loads(lines[-1]), process=wall))
+
+    print(f"app: {args.app}  signals: {args.signals}  charts: {'on' if args.charts else 'off'}  repeats: {args.repeat}")
+    for key in ('process', 'streamlit_import', 'first_run'):
+        values = [r[key] for r in runs]
+        print(f"{key:<18} median {statistics.median(values) * 1e3:8.0f} ms   min {min(values) * 1e3:8.0f} ms")
+    last = runs[-1]
+    print(f"{'cards drawn':<18} {last['cards']}")
+    print(f"{'heavy modules':<18} {', '.join(last['heavy']) or '(none)'}  (loaded by process exit, incl. background warm start)")
+    if last['errors']:
+        print(f"{'page errors':<18} {last['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# cik_index.py – CIK → TICKER INDEX: LOAD ONCE, PERSIST ON DISK, REFRESH WITH CONDITIONAL GET
+import gzip
+import json
+import os
+import threading
+import time
+
+import requests
+
+import metrics
+from config import data_path
+from http_client import get_session
+
+SEC_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+REFRESH_INTERVAL = int(os.getenv('CIK_REFRESH_INTERVAL', 24 * 3600))
+FAILURE_BACKOFF = 300     # s before retrying after a failed refresh
+
+
+class CikIndex:
+    def __init__(self, path=None, url=SEC_TICKERS_URL, refresh_interval=REFRESH_INTERVAL):
+        self.path = path or data_path('company_tickers.tsv.gz')
+        self.meta_path = self.path + '.meta.json'
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.rows = []
+        self.by_cik = {}
+        self.all_tickers = frozenset()
+        self.meta = {}
+        self._failed_at = 0
+        self._lock = threading.Lock()
+        self._load_disk()
+
+    # === DISK ===
+    def _load_disk(self):
+        try:
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+            rows = []
+            with gzip.open(self.path, 'rt') as f:
+                for line in f:
+                    cik, ticker = line.rstrip('\n').split('\t')
+                    rows.append((int(cik), ticker))
+            self._set_rows(rows)
+        except (OSError, ValueError):
+            self._set_rows([])
+            self.meta = {}
+
+    # SEC lists the primary share class first – by_cik keeps it, like the old
+    # linear scan did; all_tickers keeps every class for symbol validation
+    def _set_rows(self, rows):
+        by_cik = {}
+        for cik, ticker in rows:
+            by_cik.setdefault(cik, ticker)
+        self.rows = rows
+        self.by_cik = by_cik
+        self.all_tickers = frozenset(ticker for _, ticker in rows)
+
+    def _save_disk(self):
+        tmp = self.path + '.tmp'
+        with gzip.open(tmp, 'wt') as f:
+            f.writelines(f"{cik}\t{ticker}\n" for cik, ticker in self.rows)
+        os.replace(tmp, self.path)
+        tmp = self.meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self.meta_path)
+
+    # === REFRESH (ETag / Last-Modified) ===
+    def is_stale(self):
+        return not self.by_cik or time.time() - self.meta.get('fetched_at', 0) > self.refresh_interval
+
+    # after a failure, callers keep the on-disk copy instead of each paying the timeout again
+    def backing_off(self):
+        return time.time() - self._failed_at < min(self.refresh_interval, FAILURE_BACKOFF)
+
+    def refresh(self, force=False):
+        with self._lock:
+            if not force and (not self.is_stale() or self.backing_off()):
+                return False
+            headers = {}
+            if self.by_cik:
+                if self.meta.get('etag'):
+                    headers['If-None-Match'] = self.meta['etag']
+                if self.meta.get('last_modified'):
+                    headers['If-Modified-Since'] = self.meta['last_modified']
+            try:
+                r = get_session().get(self.url, headers=headers, timeout=15)
+                if r.status_code == 304:
+                    metrics.inc('cache_requests_total', cache='cik_index', result='hit')
+                    self.meta['fetched_at'] = time.time()
+                    self._save_disk()
+                    return False
+                r.raise_for_status()
+                rows = [(int(v['cik_str']), v['ticker']) for v in r.json().values()]
+            except (requests.RequestException, ValueError, KeyError, OSError):
+                # SEC unreachable / bad payload: keep serving the on-disk copy
+                metrics.inc('cik_index_refresh_errors_total')
+                self._failed_at = time.time()
+                return False
+            metrics.inc('cache_requests_total', cache='cik_index', result='miss')
+            self._set_rows(rows)
+            self.meta = {
+                'etag': r.headers.get('ETag'),
+                'last_modified': r.headers.get('Last-Modified'),
+                'fetched_at': time.time(),
+            }
+            try:
+                self._save_disk()
+            except OSError:
+                pass
+            return True
+
+    # === LOOKUPS ===
+    def lookup(self, cik):
+        try:
+            return self.by_cik.get(int(cik))
+        except (TypeError, ValueError):
+            return None
+
+    # ticker universe for validating symbols pulled out of free text
+    def tickers(self):
+        return self.all_tickers
+
+    def lookup_many(self, ciks):
+        by_cik = self.by_cik
+        out = {}
+        for cik in ciks:
+            try:
+                ticker = by_cik.get(int(cik))
+            except (TypeError, ValueError):
+                continue
+            if ticker:
+                out[cik] = ticker
+        return out
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index():
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = CikIndex()
+    _INDEX.refresh()
+    return _INDEX
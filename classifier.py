@@ -0,0 +1,136 @@
+# classifier.py – RULE-DRIVEN SIGNAL CLASSIFIER (RULES FROM signal_rules.json)
+# Every keyword/form term for a field is de-duplicated into one table mapping
+# the term to the rule parts it satisfies, so a title is scanned once per
+# unique term and the hits come straight out of that pass. Ticker candidates
+# are validated against the CIK/ticker universe with a set lookup instead of
+# trusting any 1–5 letter capital word.
+import json
+import re
+import threading
+
+from config import SIGNAL_RULES_PATH
+
+TICKER_RE = re.compile(r'\b[A-Z]{1,5}\b')
+STAKE_RE = re.compile(r'(\d+\.\d+)%')
+
+
+def load_rules(path=SIGNAL_RULES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+# rules: list of dicts with optional 'keywords' / 'forms' lists.
+# Returns the term → rule-part credits table over every unique (lower-cased)
+# term, and the rules with their required parts.
+def _compile(rules):
+    credits = {}
+    compiled = []
+    for n, rule in enumerate(rules):
+        required = set()
+        for field in ('keywords', 'forms'):
+            for term in rule.get(field) or []:
+                credits.setdefault(term.lower(), set()).add(f"r{n}_{field}")
+                required.add(f"r{n}_{field}")
+        compiled.append((rule['type'], frozenset(required), rule))
+    return [(t, frozenset(c)) for t, c in credits.items()], compiled
+
+
+class CompiledRules:
+    def __init__(self, rules):
+        self.version = rules.get('version')
+        self.headline_terms, self.headline_rules = _compile(rules.get('headlines', []))
+        self.filing_terms, self.filing_rules = _compile(rules.get('filings', []))
+        self.stopwords = frozenset(rules.get('ticker_stopwords', []))
+
+
+# Callers lower-case once. str containment per term beats a combined re
+# alternation here: CPython's re tries every branch at every offset, while
+# `in` is a C fast-search – ~2.5x faster on the sample corpus's few terms.
+def _hits(terms, text):
+    hits = set()
+    for term, credit in terms:
+        if term in text:
+            hits |= credit
+    return hits
+
+
+class SignalClassifier:
+    def __init__(self, rules=None, universe=None):
+        self.rules = rules if isinstance(rules, CompiledRules) else CompiledRules(rules or load_rules())
+        self.universe = universe if universe is not None else frozenset()
+
+    # === TICKERS ===
+    def extract_ticker(self, text):
+        stop, universe = self.rules.stopwords, self.universe
+        for cand in TICKER_RE.findall(text):
+            if cand in stop: continue
+            # without a universe (index never loaded) fall back to the stopword filter alone
+            if not universe or cand in universe:
+                return cand
+        return None
+
+    # === HEADLINES ===
+    # items: dicts with 'title' and 'link'
+    def classify_headlines(self, items):
+        signals = []
+        terms, rules = self.rules.headline_terms, self.rules.headline_rules
+        for item in items:
+            title = item['title']
+            hits = _hits(terms, title.lower())
+            if not hits: continue
+            for sig_type, required, rule in rules:
+                if not required <= hits: continue
+                ticker = self.extract_ticker(title)
+                if ticker:
+                    signals.append({
+                        'type': sig_type,
+                        'ticker': ticker,
+                        'title': title,
+                        'link': item.get('link', ''),
+                        'source': rule.get('source', ''),
+                        'filing_text': ''
+                    })
+                break
+        return signals
+
+    # === FILINGS ===
+    # entries: parsed EDGAR entries (see edgar.parse_entry); tickers: {cik: ticker}
+    def classify_filings(self, entries, tickers):
+        signals = []
+        terms, rules = self.rules.filing_terms, self.rules.filing_rules
+        for e in entries:
+            ticker = tickers.get(e['cik'])
+            if not ticker: continue
+            title = e['title']
+            hits = _hits(terms, title.lower())
+            if not hits: continue
+            filing_text = f"Title: {title}\nSummary: {e.get('summary', '')}"
+            for sig_type, required, rule in rules:
+                if not required <= hits: continue
+                sig = {'type': sig_type, 'ticker': ticker, 'title': title, 'link': e['link'], 'cik': e['cik'], 'filing_text': filing_text}
+                if rule.get('items'):
+                    # item sections the scanner pulls from the full filing (see filings.py)
+                    sig['form'], sig['items'] = e.get('form', ''), rule['items']
+                if 'min_stake' in rule:
+                    stake = STAKE_RE.search(title)
+                    if not stake or float(stake.group(1)) < rule['min_stake']: continue
+                    sig['stake'] = stake.group(1)
+                signals.append(sig)
+        return signals
+
+
+_RULES = None
+_CLASSIFIER = None
+_LOCK = threading.Lock()
+
+
+# Rules compile once per process; the classifier is rebuilt only when the
+# ticker universe object changes (i.e. after a CIK index refresh)
+def get_classifier(universe=frozenset()):
+    global _RULES, _CLASSIFIER
+    with _LOCK:
+        if _RULES is None:
+            _RULES = CompiledRules(load_rules())
+        if _CLASSIFIER is None or _CLASSIFIER.universe is not universe:
+            _CLASSIFIER = SignalClassifier(_RULES, universe)
+        return _CLASSIFIER
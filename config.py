@@ -0,0 +1,65 @@
+# config.py – SHARED SETTINGS FOR APP + BACKGROUND MODULES
+import os
+import tomllib
+
+from dotenv import load_dotenv
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# === Load Env (LOCAL) / Secrets (CLOUD) ===
+# Read .streamlit/secrets.toml directly so the headless scanner doesn't need streamlit
+load_dotenv()
+try:
+    with open(os.path.join(ROOT_DIR, '.streamlit', 'secrets.toml'), 'rb') as f:
+        _SECRETS = tomllib.load(f)
+except (OSError, tomllib.TOMLDecodeError):
+    _SECRETS = {}
+
+
+def get_secret(name, default=""):
+    return os.getenv(name) or _SECRETS.get(name, default)
+
+
+API_KEY = get_secret('ALPHA_VANTAGE_API_KEY')
+XAI_API_KEY = get_secret('XAI_API_KEY')
+TELEGRAM_TOKEN = get_secret('TELEGRAM_TOKEN')
+TELEGRAM_CHAT_ID = get_secret('TELEGRAM_CHAT_ID')
+
+MONTHLY_TOKEN_LIMIT = 1000000
+
+# === HTTP ===
+# SEC fair access: a declared User-Agent with a contact address, ≤ 10 requests/s.
+# The Mozilla/5.0 prefix keeps finviz / Yahoo serving the regular page.
+CONTACT = get_secret('SCANNER_CONTACT')
+USER_AGENT = get_secret('SCANNER_USER_AGENT', f"Mozilla/5.0 (compatible; MnA-Scanner/1.0; +{CONTACT or 'contact unset'})")
+HEADERS = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip, deflate'}
+SEC_RATE_LIMIT = float(os.getenv('SEC_RATE_LIMIT', 10))        # requests/s; 0 = unthrottled
+HOST_RATE_LIMITS = {'www.sec.gov': SEC_RATE_LIMIT, 'data.sec.gov': SEC_RATE_LIMIT, 'efts.sec.gov': SEC_RATE_LIMIT}
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 3))                # idempotent requests only
+HTTP_CACHE_MAX_MB = int(os.getenv('HTTP_CACHE_MAX_MB', 256))
+
+# === SCANNER ===
+SCAN_INTERVAL = int(os.getenv('SCAN_INTERVAL', 300))
+SIGNAL_RULES_PATH = os.getenv('SIGNAL_RULES', os.path.join(ROOT_DIR, 'signal_rules.json'))
+
+# === INSIDER CLUSTERS ===
+INSIDER_MIN_VALUE = float(os.getenv('INSIDER_MIN_VALUE', 500000))     # per buy, $
+INSIDER_MIN_BUYERS = int(os.getenv('INSIDER_MIN_BUYERS', 2))          # distinct insiders
+INSIDER_WINDOW_DAYS = int(os.getenv('INSIDER_WINDOW_DAYS', 14))
+INSIDER_RETENTION_DAYS = int(os.getenv('INSIDER_RETENTION_DAYS', 365))
+FORM4_MAX_PER_SCAN = int(os.getenv('FORM4_MAX_PER_SCAN', 40))
+FORM4_MAX_ATTEMPTS = int(os.getenv('FORM4_MAX_ATTEMPTS', 3))    # per filing, then it is skipped
+
+# === PEER INDEX ===
+PEER_COUNT = int(os.getenv('PEER_COUNT', 4))
+PEER_REFRESH_INTERVAL = int(os.getenv('PEER_REFRESH_INTERVAL', 24 * 3600))   # bulk metrics refresh, s
+
+# === LOCAL STORE ===
+HISTORY_RETENTION_DAYS = int(os.getenv('HISTORY_RETENTION_DAYS', 90))
+RECENT_SIGNAL_HOURS = int(os.getenv('RECENT_SIGNAL_HOURS', 24))   # SEC signals kept in the latest view
+DATA_DIR = os.getenv('SCANNER_DATA_DIR', os.path.join(ROOT_DIR, '.scanner'))
+
+
+def data_path(*parts):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, *parts)
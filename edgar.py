@@ -0,0 +1,161 @@
+# edgar.py – INCREMENTAL EDGAR "getcurrent" INGESTER (HIGH-WATER MARK + SEEN ACCESSIONS)
+import calendar
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import feedparser
+
+import metrics
+from config import data_path
+
+SEC_CURRENT_URL = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&type={form}&company=&dateb=&owner=include&start={start}&count={count}&output=atom"
+PAGE_SIZE = 100
+MAX_PAGES = 10
+SEEN_LIMIT = 5000
+
+
+def parse_entry(e):
+    title = e.get('title', '')
+    link = e.get('link', '')
+    acc = re.search(r'accession-number=([\d-]+)', e.get('id', '')) or re.search(r'(\d{10}-\d{2}-\d{6})', link)
+    cik = re.search(r'\((\d{10})\)', title) or re.search(r'/edgar/data/(\d+)/', link) or re.search(r'CIK=(\d+)', link)
+    form = title.split(' - ', 1)[0].strip() if ' - ' in title else ''
+    updated = e.get('updated_parsed')
+    return {
+        'accession': acc.group(1) if acc else '',
+        'cik': str(int(cik.group(1))) if cik else '',
+        'form': form,
+        'title': title,
+        'link': link,
+        'summary': e.get('summary', ''),
+        'updated': calendar.timegm(updated) if updated else 0,
+    }
+
+
+def entry_key(entry):
+    # the same accession is listed once per party (Filer / Subject / Reporting)
+    return f"{entry['accession']}:{entry['cik']}"
+
+
+# last_updated is a true high-water mark: every filing at or below it has been
+# processed. A poll cut short (deadline / max_pages) before reaching it leaves a
+# gap; the mark then stays put and `resume` records where paging stopped.
+class EdgarIngester:
+    def __init__(self, form='', state_path=None, page_size=PAGE_SIZE, max_pages=MAX_PAGES, seen_limit=SEEN_LIMIT):
+        self.form = form
+        self.state_path = state_path or data_path(f"edgar_state{'_' + form if form else ''}.json")
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.seen = deque(maxlen=seen_limit)
+        self._seen_set = set()
+        self.last_accession = None
+        self.last_updated = 0
+        self.resume = None
+        self._lock = threading.Lock()
+        self._load()
+
+    # === STATE ===
+    def _load(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.last_accession = state.get('last_accession')
+        self.last_updated = state.get('last_updated', 0)
+        self.resume = state.get('resume')
+        self.seen.extend(state.get('seen', []))
+        self._seen_set = set(self.seen)
+
+    def _save(self):
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'last_accession': self.last_accession, 'last_updated': self.last_updated,
+                       'resume': self.resume, 'seen': list(self.seen)}, f)
+        os.replace(tmp, self.state_path)
+
+    def below_mark(self, entry):
+        return bool(self.last_updated and entry['updated'] and entry['updated'] < self.last_updated)
+
+    def _page(self, session, start, timeout):
+        url = SEC_CURRENT_URL.format(form=self.form, start=start, count=self.page_size)
+        r = session.get(url, timeout=timeout)
+        r.raise_for_status()
+        return [parse_entry(e) for e in feedparser.parse(r.content).entries]
+
+    # === POLL ===
+    # Pages back from the newest filing until it reaches the high-water mark, a
+    # filing seen by the last complete poll, or the end of the feed. With a gap
+    # open it skips seen filings instead of stopping, and once it meets the
+    # previous poll's newest filing (the cursor's anchor) it jumps straight to
+    # where that poll stopped. A cold start only takes the first page.
+    # Returns (new entries, cursor); cursor is None when the poll was complete.
+    def poll(self, session, timeout=15, deadline=None):
+        cold = not self.last_updated and not self.seen
+        resume = self.resume
+        new, start, anchor, complete, jumped = [], 0, None, False, False
+        for _ in range(self.max_pages):
+            if deadline and time.monotonic() > deadline:
+                break
+            entries = self._page(session, start, timeout)
+            if start == 0 and entries:
+                anchor = entry_key(entries[0])
+            target = start + len(entries)
+            for i, entry in enumerate(entries):
+                if self.below_mark(entry):
+                    complete = True
+                    break
+                key = entry_key(entry)
+                if key in self._seen_set:
+                    if not resume:
+                        complete = True
+                        break
+                    if not jumped and key == resume.get('anchor'):
+                        # the anchor sat at offset 0 last time: everything up to the cursor is fetched
+                        jumped = True
+                        target = max(target, resume['start'] + start + i)
+                        break
+                    continue
+                new.append(entry)
+            if complete or cold or len(entries) < self.page_size:
+                complete = True
+                break
+            start = target
+        if complete:
+            return new, None
+        metrics.inc('edgar_poll_incomplete_total', form=self.form or 'all')
+        return new, {'start': start, 'anchor': anchor}
+
+    # cursor None: the poll reached the mark, so it moves up to the newest entry
+    # taken since the gap opened. Otherwise the mark stays and the cursor is kept.
+    def commit(self, entries, cursor=None):
+        if not entries and cursor is None and self.resume is None:
+            return
+        with self._lock:
+            for entry in reversed(entries):
+                key = entry_key(entry)
+                if key in self._seen_set: continue
+                if len(self.seen) == self.seen.maxlen:
+                    self._seen_set.discard(self.seen[0])
+                self.seen.append(key)
+                self._seen_set.add(key)
+            # the newest filing taken while a gap is open rides along in the cursor,
+            # so closing the gap can move the mark past everything taken meanwhile
+            top = [(e['updated'], e['accession']) for e in entries]
+            if self.resume and self.resume.get('top'):
+                top.append(tuple(self.resume['top']))
+            newest = max(top, default=None)
+            if cursor is not None:
+                self.resume = dict(cursor, top=newest)
+            else:
+                self.resume = None
+                if newest and newest[0] >= self.last_updated:
+                    self.last_updated, self.last_accession = newest
+            try:
+                self._save()
+            except OSError:
+                pass
@@ -0,0 +1,212 @@
+# filings.py – STREAMING FULL-FILING FETCHER: ITEM-SECTION EXTRACTION + CONTENT-ADDRESSED CACHE
+# Resolves the primary document from the EDGAR "-index.htm" page, streams it in
+# chunks through an incremental HTML→text parser, keeps only the wanted
+# "Item X.XX" sections (bounded), and stops reading once a wanted one is complete.
+import codecs
+import gzip
+import hashlib
+import os
+import re
+import threading
+from html.parser import HTMLParser
+
+import metrics
+from config import data_path
+from http_client import get_session
+from parsing import parse_filing_index
+
+CHUNK_SIZE = 64 * 1024
+MAX_BYTES = 8 * 1024 * 1024
+SECTION_LIMIT = 20000
+
+HEADING_RE = re.compile(r'^\W{0,3}item\s*(\d{1,2}(?:\.\d{2})?)\b', re.IGNORECASE)
+END_RE = re.compile(r'^\W{0,3}signatures?\b', re.IGNORECASE)
+BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'center', 'pre'}
+SKIP_TAGS = {'script', 'style', 'head'}
+
+
+# === INCREMENTAL SECTION EXTRACTOR ===
+# Fed lines of text; keeps only lines under a wanted item heading. An 8-K rarely
+# carries every wanted item, so it is done as soon as one wanted section is
+# complete (over 200 chars) and a later heading that isn't wanted closes it.
+class SectionExtractor:
+    def __init__(self, items, limit=SECTION_LIMIT):
+        self.items = [str(i) for i in items]
+        self.limit = limit
+        self.sections = {}
+        self._current = None
+        self._buf = []
+        self._size = 0
+        self._complete = False
+        self.done = False
+
+    def _close(self):
+        if self._current is not None:
+            text = '\n'.join(self._buf).strip()
+            # a table-of-contents line can look like a heading – keep the longest capture
+            if len(text) > len(self.sections.get(self._current, '')):
+                self.sections[self._current] = text
+            self._complete = self._complete or len(text) > 200
+        self._current, self._buf, self._size = None, [], 0
+
+    def feed_line(self, line):
+        line = ' '.join(line.split())
+        if not line:
+            return
+        m = HEADING_RE.match(line)
+        if m or END_RE.match(line):
+            self._close()
+            if m and m.group(1) in self.items:
+                self._current = m.group(1)
+            elif self._complete:
+                self.done = True
+                return
+        if self._current is not None and self._size < self.limit:
+            self._buf.append(line)
+            self._size += len(line) + 1
+
+    def finish(self):
+        self._close()
+        return '\n\n'.join(self.sections[i] for i in self.items if i in self.sections)
+
+
+class _TextParser(HTMLParser):
+    def __init__(self, on_line):
+        super().__init__(convert_charrefs=True)
+        self.on_line = on_line
+        self._line = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS: self._skip += 1
+        elif tag in BLOCK_TAGS or tag == 'td': self._flush(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS: self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS: self._flush(tag)
+
+    def handle_data(self, data):
+        if self._skip: return
+        # plain-text filings (.txt) carry their own newlines
+        *complete, rest = data.split('\n')
+        for part in complete:
+            self._line.append(part)
+            self._flush('\n')
+        self._line.append(rest)
+
+    def _flush(self, tag):
+        if tag == 'td':
+            self._line.append(' ')
+            return
+        if self._line:
+            self.on_line(''.join(self._line))
+            self._line = []
+
+    def close(self):
+        super().close()
+        self._flush('\n')
+
+
+# === CONTENT-ADDRESSED CACHE ===
+# objects/<sha256>.txt.gz holds extracted text; refs/<accession>-<items> points at it
+class FilingCache:
+    def __init__(self, root=None):
+        self.root = root or data_path('filings')
+        os.makedirs(os.path.join(self.root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'refs'), exist_ok=True)
+
+    def _ref(self, key):
+        return os.path.join(self.root, 'refs', re.sub(r'[^\w.-]', '_', key))
+
+    def _obj(self, digest):
+        return os.path.join(self.root, 'objects', digest + '.txt.gz')
+
+    def get(self, key):
+        try:
+            with open(self._ref(key)) as f:
+                digest = f.read().strip()
+            with gzip.open(self._obj(digest), 'rt') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, text):
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        obj = self._obj(digest)
+        if not os.path.exists(obj):
+            tmp = obj + '.tmp'
+            with gzip.open(tmp, 'wt') as f:
+                f.write(text)
+            os.replace(tmp, obj)
+        with open(self._ref(key), 'w') as f:
+            f.write(digest)
+        return digest
+
+
+# === FETCH ===
+def accession_from_link(link):
+    m = re.search(r'(\d{10}-\d{2}-\d{6})', link)
+    return m.group(1) if m else None
+
+
+# index_content: bytes of the EDGAR "-index.htm" page (see parsing.parse_filing_index)
+def primary_document(index_content, base_url, form='', headers=None):
+    docs = parse_filing_index(index_content, base_url, headers)
+    for doc in docs:
+        if form and doc.type.startswith(form.upper()):
+            return doc.url
+    return docs[0].url
+
+
+def stream_sections(session, url, items, timeout=20, max_bytes=MAX_BYTES):
+    extractor = SectionExtractor(items)
+    parser = _TextParser(extractor.feed_line)
+    read = 0
+    with session.get(url, stream=True, timeout=timeout) as r:
+        r.raise_for_status()
+        decoder = codecs.getincrementaldecoder(r.encoding or 'utf-8')(errors='replace')
+        for chunk in r.iter_content(CHUNK_SIZE):
+            read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if extractor.done or read >= max_bytes:
+                break
+    parser.close()
+    return extractor.finish()
+
+
+class FilingFetcher:
+    def __init__(self, cache=None, session=None):
+        self.cache = cache or FilingCache()
+        self.session = session
+
+    # link: the EDGAR "-index.htm" link from the feed; items: e.g. ['1.01', '2.01']
+    def fetch(self, link, form='', items=()):
+        accession = accession_from_link(link)
+        if not accession or not items:
+            return ''
+        key = f"{accession}-{'_'.join(items)}"
+        cached = self.cache.get(key)
+        metrics.inc('cache_requests_total', cache='filings', result='hit' if cached is not None else 'miss')
+        if cached is not None:
+            return cached
+        session = self.session or get_session()
+        r = session.get(link, timeout=15)
+        r.raise_for_status()
+        doc_url = primary_document(r.content, link, form, r.headers)
+        text = stream_sections(session, doc_url, items)
+        # an empty extraction may be a layout the extractor missed or a cut-short read – retry it next time
+        if text:
+            self.cache.put(key, text)
+        return text
+
+
+_FETCHER = None
+_FETCHER_LOCK = threading.Lock()
+
+
+def get_fetcher():
+    global _FETCHER
+    with _FETCHER_LOCK:
+        if _FETCHER is None:
+            _FETCHER = FilingFetcher()
+    return _FETCHER
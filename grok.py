@@ -0,0 +1,213 @@
+# grok.py – GROK AI ANALYSIS: CONTENT-HASH CACHE, PERSISTED TOKEN BUDGET, BATCH SCHEDULER
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import metrics
+from config import MONTHLY_TOKEN_LIMIT, XAI_API_KEY, data_path
+
+GROK_URL = "https://api.x.ai/v1/chat/completions"
+GROK_MODEL = "grok-4"
+MAX_TOKENS = 500
+GROK_CONCURRENCY = int(os.getenv('GROK_CONCURRENCY', 4))
+# bump when the prompt/model changes so old analyses aren't served for the new prompt
+PROMPT_VERSION = 2
+PROMPT_TEXT_LIMIT = 8000
+RESERVATION_TTL = 300        # a reservation left by a crashed process stops counting after this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usage (
+    ts REAL NOT NULL,
+    month TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_month ON usage(month);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    tokens INTEGER NOT NULL
+);
+"""
+
+
+def build_prompt(filing_text, signal_type, ticker):
+    return f"Analyze {signal_type} for {ticker}: M&A, risks, entities. Bullet points. Filing: {filing_text[:PROMPT_TEXT_LIMIT]}..."
+
+
+def cache_key(filing_text, signal_type, ticker):
+    return hashlib.sha256(f"{PROMPT_VERSION}\0{GROK_MODEL}\0{signal_type}\0{ticker}\0{filing_text}".encode()).hexdigest()
+
+
+def _month():
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _usage(prompt_tokens, completion_tokens, cached=False):
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'cost': (prompt_tokens / 1e6 * 5) + (completion_tokens / 1e6 * 15),
+        'cached': cached,
+    }
+
+
+# === CACHE + USAGE LEDGER ===
+# Filings are immutable, so analyses never expire – only PROMPT_VERSION retires them
+class GrokStore:
+    def __init__(self, path=None, monthly_limit=MONTHLY_TOKEN_LIMIT):
+        self.monthly_limit = monthly_limit
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path or data_path('grok.sqlite'), check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def get(self, key):
+        with self._lock:
+            row = self.db.execute("SELECT text, prompt_tokens, completion_tokens FROM analyses WHERE key = ?", (key,)).fetchone()
+        return (row[0], _usage(row[1], row[2], cached=True)) if row else None
+
+    def put(self, key, text, usage):
+        with self._lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO analyses (key, text, prompt_tokens, completion_tokens, created) VALUES (?, ?, ?, ?, ?)",
+                            (key, text, usage['prompt_tokens'], usage['completion_tokens'], time.time()))
+
+    def record_usage(self, usage):
+        with self._lock, self.db:
+            self.db.execute("INSERT INTO usage (ts, month, prompt_tokens, completion_tokens) VALUES (?, ?, ?, ?)",
+                            (time.time(), _month(), usage['prompt_tokens'], usage['completion_tokens']))
+
+    def used_this_month(self):
+        with self._lock:
+            row = self.db.execute("SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM usage WHERE month = ?", (_month(),)).fetchone()
+        return row[0]
+
+    def _committed(self):
+        used = self.db.execute("SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM usage WHERE month = ?", (_month(),)).fetchone()[0]
+        held = self.db.execute("SELECT COALESCE(SUM(tokens), 0) FROM reservations WHERE ts > ?", (time.time() - RESERVATION_TTL,)).fetchone()[0]
+        return used + held
+
+    def remaining(self):
+        with self._lock:
+            return max(0, self.monthly_limit - self._committed())
+
+    # === BUDGET ===
+    # Reserve a worst-case estimate before calling; settle() swaps it for real usage.
+    # Reservations live in the ledger and the check-and-insert runs under a write
+    # lock (BEGIN IMMEDIATE), so the limit holds across threads and processes.
+    # Returns a reservation id, or None when the budget can't cover the estimate.
+    def reserve(self, estimate):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute("DELETE FROM reservations WHERE ts <= ?", (time.time() - RESERVATION_TTL,))
+                if self.monthly_limit - self._committed() < estimate:
+                    self.db.commit()
+                    return None
+                rid = self.db.execute("INSERT INTO reservations (ts, tokens) VALUES (?, ?)", (time.time(), estimate)).lastrowid
+                self.db.commit()
+            except BaseException:
+                self.db.rollback()
+                raise
+        return rid
+
+    def settle(self, reservation, usage=None):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM reservations WHERE id = ?", (reservation,))
+            if usage:
+                self.db.execute("INSERT INTO usage (ts, month, prompt_tokens, completion_tokens) VALUES (?, ?, ?, ?)",
+                                (time.time(), _month(), usage['prompt_tokens'], usage['completion_tokens']))
+
+
+def estimate_tokens(prompt):
+    return len(prompt) // 3 + MAX_TOKENS
+
+
+# === SINGLE CALL ===
+def _call_grok(prompt):
+    # deferred: the page reads the usage ledger without loading requests
+    from http_client import get_session
+    headers = {"Authorization": f"Bearer {XAI_API_KEY}", "Content-Type": "application/json"}
+    payload = {
+        "model": GROK_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": MAX_TOKENS,
+        "temperature": 0.2
+    }
+    response = get_session().post(GROK_URL, json=payload, headers=headers, timeout=30)
+    if response.status_code != 200:
+        return f"API Error: {response.status_code}", None
+    data = response.json()
+    usage = data.get('usage', {})
+    return data['choices'][0]['message']['content'], _usage(usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0))
+
+
+# Returns (text, usage); usage is empty when nothing was analysed, and has
+# cached=True when the answer came from the store without spending tokens
+def analyze_with_grok(filing_text, signal_type, ticker, store=None):
+    if not XAI_API_KEY or not filing_text:
+        return "Grok analysis unavailable.", {}
+    store = store or get_store()
+    key = cache_key(filing_text, signal_type, ticker)
+    hit = store.get(key)
+    metrics.inc('cache_requests_total', cache='grok', result='hit' if hit else 'miss')
+    if hit:
+        return hit
+    prompt = build_prompt(filing_text, signal_type, ticker)
+    estimate = estimate_tokens(prompt)
+    reservation = store.reserve(estimate)
+    if reservation is None:
+        metrics.inc('grok_budget_skips_total')
+        return "Grok analysis skipped – monthly token budget reached.", {}
+    usage = None
+    try:
+        with metrics.timer('grok_call_seconds'):
+            text, usage = _call_grok(prompt)
+    except Exception as e:
+        return f"Error: {str(e)}", {}
+    finally:
+        store.settle(reservation, usage)
+    if usage:
+        metrics.inc('grok_tokens_total', usage['prompt_tokens'], kind='prompt')
+        metrics.inc('grok_tokens_total', usage['completion_tokens'], kind='completion')
+        store.put(key, text, usage)
+        return text, usage
+    return text, {}
+
+
+# === BATCH SCHEDULER ===
+# jobs: (filing_text, signal_type, ticker) tuples → results in the same order.
+# Identical jobs run once, cache hits skip the pool, and at most
+# `concurrency` requests are in flight; the budget is enforced per request.
+def analyze_many(jobs, concurrency=GROK_CONCURRENCY, store=None):
+    store = store or get_store()
+    unique = list(dict.fromkeys(jobs))
+    if not unique:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(unique))), thread_name_prefix='grok') as pool:
+        results = dict(zip(unique, pool.map(lambda job: analyze_with_grok(*job, store=store), unique)))
+    return [results[job] for job in jobs]
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store():
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = GrokStore()
+    return _STORE
@@ -0,0 +1,162 @@
+# history.py – DURABLE, BOUNDED SCAN HISTORY (SQLITE, APPEND-ONLY)
+import csv
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from config import HISTORY_RETENTION_DAYS, data_path
+
+EXPORT_COLUMNS = ['scan_time', 'type', 'ticker', 'title', 'link', 'source', 'cik', 'stake', 'insiders', 'grok', 'filing_text']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    scan_time TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id) ON DELETE CASCADE,
+    ts REAL NOT NULL,
+    ticker TEXT,
+    type TEXT,
+    title TEXT,
+    link TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_ts ON scans(ts);
+CREATE INDEX IF NOT EXISTS idx_signals_scan ON signals(scan_id);
+CREATE INDEX IF NOT EXISTS idx_signals_ticker ON signals(ticker, ts);
+CREATE INDEX IF NOT EXISTS idx_signals_type ON signals(type, ts);
+CREATE INDEX IF NOT EXISTS idx_signals_ts ON signals(ts);
+CREATE INDEX IF NOT EXISTS idx_signals_identity ON signals(type, link, title);
+"""
+
+
+class HistoryStore:
+    def __init__(self, path=None, retention_days=HISTORY_RETENTION_DAYS):
+        self.retention_days = retention_days
+        self.path = path or data_path('history.sqlite')
+        self._lock = threading.Lock()
+        self.db = self._connect()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA foreign_keys=ON")
+        return db
+
+    # === WRITE ===
+    # Insider clusters and news are re-reported by every scan until they age out;
+    # a signal already on file (same type, link and title) is not stored again.
+    # A changed cluster gets a new title, so it is kept. Returns None when nothing was new.
+    def _unseen(self, signals):
+        out, have = [], set()
+        for s in signals:
+            key = (s.get('type'), s.get('link', ''), s.get('title', ''))
+            if key in have:
+                continue
+            have.add(key)
+            if self.db.execute("SELECT 1 FROM signals WHERE type IS ? AND link IS ? AND title IS ? LIMIT 1", key).fetchone() is None:
+                out.append(s)
+        return out
+
+    def append_scan(self, scan_time, signals, ts=None):
+        ts = ts or time.time()
+        with self._lock, self.db:
+            signals = self._unseen(signals)
+            if not signals:
+                return None
+            scan_id = self.db.execute("INSERT INTO scans (ts, scan_time, count) VALUES (?, ?, ?)", (ts, scan_time, len(signals))).lastrowid
+            self.db.executemany(
+                "INSERT INTO signals (scan_id, ts, ticker, type, title, link, payload) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(scan_id, ts, s.get('ticker'), s.get('type'), s.get('title', ''), s.get('link', ''), json.dumps(s, default=str)) for s in signals],
+            )
+        self.prune()
+        return scan_id
+
+    # === RETENTION ===
+    def prune(self, retention_days=None):
+        days = self.retention_days if retention_days is None else retention_days
+        if not days:
+            return 0
+        cutoff = time.time() - days * 86400
+        with self._lock, self.db:
+            return self.db.execute("DELETE FROM scans WHERE ts < ?", (cutoff,)).rowcount
+
+    def clear(self):
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM scans")
+
+    # === PAGED READS ===
+    def count_scans(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+
+    def recent_scans(self, limit=10, offset=0):
+        with self._lock:
+            rows = self.db.execute("SELECT id, scan_time, count FROM scans ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [{'id': r['id'], 'time': r['scan_time'], 'count': r['count']} for r in rows]
+
+    def scan_signals(self, scan_ids):
+        out = {i: [] for i in scan_ids}
+        if not scan_ids:
+            return out
+        marks = ','.join('?' * len(scan_ids))
+        with self._lock:
+            rows = self.db.execute(f"SELECT scan_id, payload FROM signals WHERE scan_id IN ({marks}) ORDER BY id", list(scan_ids)).fetchall()
+        for r in rows:
+            out[r['scan_id']].append(json.loads(r['payload']))
+        return out
+
+    def query_signals(self, ticker=None, type=None, since=None, limit=50, offset=0):
+        where, args = [], []
+        if ticker: where.append("ticker = ?"); args.append(ticker)
+        if type: where.append("type = ?"); args.append(type)
+        if since: where.append("ts >= ?"); args.append(since)
+        sql = "SELECT payload, ts FROM signals" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self.db.execute(sql, args + [limit, offset]).fetchall()
+        out = []
+        for r in rows:
+            sig = json.loads(r['payload'])
+            sig['scan_time'] = datetime.fromtimestamp(r['ts']).strftime("%Y-%m-%d %H:%M:%S")
+            out.append(sig)
+        return out
+
+    # === STREAMING CSV EXPORT ===
+    # Yields CSV text a chunk of rows at a time straight off its own cursor
+    def iter_csv(self, chunk_rows=500):
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        db = self._connect()
+        cur = db.execute("SELECT s.payload, sc.scan_time FROM signals s JOIN scans sc ON sc.id = s.scan_id ORDER BY s.ts, s.id")
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            for r in rows:
+                sig = json.loads(r['payload'])
+                sig['scan_time'] = r['scan_time']
+                writer.writerow(sig)
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+        db.close()
+
+    def export_csv(self):
+        f = tempfile.TemporaryFile()
+        for chunk in self.iter_csv():
+            f.write(chunk.encode())
+        f.seek(0)
+        return f
@@ -0,0 +1,282 @@
+# http_client.py – SHARED POLITE HTTP CLIENT (POOLED, RATE-LIMITED, RETRYING, CACHING)
+# Every source goes through get_session(): one keep-alive pool, a token bucket
+# per host (SEC: 10 req/s), jittered retries for idempotent requests, and an
+# on-disk cache that serves fresh responses locally and revalidates stale ones
+# with ETag / Last-Modified, so unchanged pages come back as 304s.
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from config import CONTACT, HEADERS, HOST_RATE_LIMITS, HTTP_CACHE_MAX_MB, HTTP_RETRIES, data_path
+from replay import HOP_HEADERS, ReplayMiss, adapter_from_env, build_response
+
+log = logging.getLogger(__name__)
+
+POOL_SIZE = 16
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT = {'GET', 'HEAD', 'OPTIONS'}
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+
+# === RATE LIMIT ===
+# Token bucket per host holding one second of burst. A caller takes its token
+# up front (the balance may go negative) and sleeps off the debt outside the
+# lock, so concurrent threads queue in arrival order.
+class RateLimiter:
+    def __init__(self, rates=None, default=0):
+        self.rates = HOST_RATE_LIMITS if rates is None else rates
+        self.default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host):
+        rate = self.rates.get(host, self.default)
+        if not rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate) - 1
+            self._buckets[host] = (tokens, now)
+        wait = -tokens / rate if tokens < 0 else 0.0
+        if wait:
+            metrics.observe('http_throttle_seconds', wait, host=host)
+            time.sleep(wait)
+        return wait
+
+
+# === RESPONSE CACHE ===
+# One entry per URL: <sha256>.json (status, headers, validators, expiry) next to
+# <sha256>.body. Only plain GETs of 200 responses that carry a validator or a
+# max-age are kept; streamed downloads have their own caches (filings.py).
+def _directives(value):
+    out = {}
+    for part in (value or '').lower().split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            out[name] = arg.strip('"')
+    return out
+
+
+# seconds a stored response may be served without asking the server again
+def _max_age(headers):
+    cc = _directives(headers.get('Cache-Control'))
+    if 'no-cache' in cc:
+        return 0
+    try:
+        return int(cc.get('max-age', 0))
+    except ValueError:
+        return 0
+
+
+class ResponseCache:
+    def __init__(self, root=None, max_bytes=HTTP_CACHE_MAX_MB * 1024 * 1024):
+        self.root = root or data_path('http_cache')
+        self.max_bytes = max_bytes
+        self._puts = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.root, hashlib.sha256(url.encode()).hexdigest())
+
+    def _write(self, path, data):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # Returns (meta, body) or None
+    def get(self, url):
+        path = self._path(url)
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            with open(path + '.body', 'rb') as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, meta):
+        return time.time() < meta.get('expires', 0)
+
+    def put(self, url, response):
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS}
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'headers': headers,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'expires': time.time() + _max_age(response.headers),
+        }
+        path = self._path(url)
+        try:
+            self._write(path + '.body', response.content)
+            self._write(path + '.json', json.dumps(meta).encode())
+        except OSError:
+            return
+        with self._lock:
+            self._puts += 1
+            prune = self._puts % 100 == 0
+        if prune:
+            self.prune()
+
+    # 304: the stored body is still good – take the new headers and expiry
+    def refresh(self, url, meta, response):
+        fresh = {k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS}
+        meta['headers'].update(fresh)
+        meta['etag'] = response.headers.get('ETag', meta['etag'])
+        meta['expires'] = time.time() + _max_age(meta['headers'])
+        try:
+            self._write(self._path(url) + '.json', json.dumps(meta).encode())
+        except OSError:
+            pass
+
+    # Least recently written entries go first once the directory outgrows max_bytes
+    def prune(self):
+        entries, total = [], 0
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.body'):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path[:-5]))
+                total += st.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for ext in ('.json', '.body'):
+                try:
+                    os.remove(path + ext)
+                except OSError:
+                    pass
+            total -= size
+
+
+def cacheable(request, stream=False):
+    if request.method != 'GET' or stream:
+        return False
+    # callers doing their own conditional GET (cik_index.py) get the raw 304
+    if 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers:
+        return False
+    return 'no-store' not in _directives(request.headers.get('Cache-Control'))
+
+
+def storable(response):
+    cc = _directives(response.headers.get('Cache-Control'))
+    if response.status_code != 200 or 'no-store' in cc or 'private' in cc:
+        return False
+    return bool(response.headers.get('ETag') or response.headers.get('Last-Modified') or _max_age(response.headers))
+
+
+# === RETRIES ===
+# Full jitter: uniform over [0, base·2^attempt], capped; Retry-After wins when given in seconds
+def backoff(attempt, response=None):
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if re.fullmatch(r'\d+', retry_after.strip()):
+        return min(BACKOFF_CAP, float(retry_after))
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+# === SESSION ===
+class PoliteSession(requests.Session):
+    def __init__(self, limiter=None, cache=None, retries=HTTP_RETRIES):
+        super().__init__()
+        self.limiter = limiter or RateLimiter()
+        self.cache = cache
+        self.retries = retries
+
+    def send(self, request, **kwargs):
+        url = request.url   # adapters may rewrite request.url (replay.ForwardingAdapter)
+        use_cache = self.cache is not None and cacheable(request, kwargs.get('stream', False))
+        cached = self.cache.get(url) if use_cache else None
+        if cached:
+            meta, body = cached
+            if self.cache.is_fresh(meta) and 'no-cache' not in _directives(request.headers.get('Cache-Control')):
+                metrics.inc('cache_requests_total', cache='http', result='hit')
+                return build_response(request, meta['status'], meta['headers'], body)
+            if meta.get('etag'):
+                request.headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request.headers['If-Modified-Since'] = meta['last_modified']
+
+        r = self._send_with_retries(request, **kwargs)
+
+        if cached and r.status_code == 304:
+            metrics.inc('cache_requests_total', cache='http', result='revalidated')
+            self.cache.refresh(url, meta, r)
+            r.close()
+            r = build_response(request, meta['status'], meta['headers'], body)
+            r.url = url
+            return r
+        if use_cache:
+            metrics.inc('cache_requests_total', cache='http', result='miss')
+            if storable(r):
+                self.cache.put(url, r)
+        return r
+
+    def _send_with_retries(self, request, **kwargs):
+        host = urlsplit(request.url).hostname or ''
+        retries = self.retries if request.method in IDEMPOTENT else 0
+        for attempt in range(retries + 1):
+            last = attempt == retries
+            try:
+                r = self._send_once(request, host, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last or isinstance(e, ReplayMiss):
+                    raise
+                delay = backoff(attempt)
+            else:
+                if last or r.status_code not in RETRY_STATUSES:
+                    return r
+                delay = backoff(attempt, r)
+                r.close()
+            metrics.inc('http_retries_total', host=host)
+            time.sleep(delay)
+
+    # Times every attempt per host; bytes come from the body (or Content-Length when streamed)
+    def _send_once(self, request, host, **kwargs):
+        self.limiter.acquire(host)
+        t0 = time.perf_counter()
+        try:
+            r = super().send(request, **kwargs)
+        except Exception:
+            metrics.inc('http_errors_total', host=host)
+            raise
+        finally:
+            metrics.observe('http_request_seconds', time.perf_counter() - t0, host=host)
+        metrics.inc('http_requests_total', host=host, status=f"{r.status_code // 100}xx")
+        size = r.headers.get('Content-Length') if kwargs.get('stream') else len(r.content)
+        if size:
+            metrics.inc('http_response_bytes_total', int(size), host=host)
+        return r
+
+
+_SESSION = None
+_LOCK = threading.Lock()
+
+
+def get_session():
+    global _SESSION
+    with _LOCK:
+        if _SESSION is None:
+            if not CONTACT:
+                log.warning("SCANNER_CONTACT is not set – SEC asks for a contact address in the User-Agent")
+            s = PoliteSession(cache=ResponseCache())
+            s.headers.update(HEADERS)
+            # SCANNER_RECORD / SCANNER_REPLAY swap in the fixture adapters (see replay.py)
+            adapter = adapter_from_env() or HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+            _SESSION = s
+    return _SESSION
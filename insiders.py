@@ -0,0 +1,318 @@
+# insiders.py – ROLLING-WINDOW INSIDER CLUSTER ENGINE (SEC FORM 4 + FINVIZ ROWS)
+# Open-market buys are stored once per transaction in SQLite, indexed by
+# (ticker, date). Each update re-aggregates only the tickers its new rows
+# touched, so a cluster forms when qualifying buys from distinct insiders
+# land within the window on different days or scans, not only when they
+# share one finviz page.
+import logging
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+
+import metrics
+from config import (FORM4_MAX_ATTEMPTS, FORM4_MAX_PER_SCAN, INSIDER_MIN_BUYERS, INSIDER_MIN_VALUE, INSIDER_RETENTION_DAYS,
+                    INSIDER_WINDOW_DAYS, data_path)
+from edgar import EdgarIngester
+from filings import primary_document
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    key TEXT PRIMARY KEY,
+    accession TEXT NOT NULL,
+    source TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    date TEXT NOT NULL,
+    code TEXT NOT NULL,
+    shares REAL,
+    price REAL,
+    value REAL NOT NULL,
+    link TEXT NOT NULL,
+    ingested REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tx_ticker_date ON transactions(ticker, date);
+CREATE INDEX IF NOT EXISTS idx_tx_accession ON transactions(accession);
+CREATE INDEX IF NOT EXISTS idx_tx_date ON transactions(date);
+"""
+
+ACCESSION_RE = re.compile(r'(\d{10})-?(\d{2})-?(\d{6})')
+
+
+def normalize_accession(text):
+    m = ACCESSION_RE.search(text or '')
+    return '-'.join(m.groups()) if m else ''
+
+
+def normalize_owner(name):
+    return ' '.join(name.split()).title()
+
+
+# === FORM 4 XML ===
+def _text(node, path):
+    el = node.find(path)
+    return el.text.strip() if el is not None and el.text else ''
+
+
+def _num(node, path):
+    try:
+        return float(_text(node, path).replace(',', ''))
+    except ValueError:
+        return 0.0
+
+
+# One record per non-derivative transaction; code 'P' is an open-market purchase
+def parse_form4(xml_bytes, accession='', link=''):
+    root = ET.fromstring(xml_bytes)
+    ticker = _text(root, 'issuer/issuerTradingSymbol').upper()
+    owner = normalize_owner(_text(root, 'reportingOwner/reportingOwnerId/rptOwnerName'))
+    out = []
+    for n, tx in enumerate(root.iter('nonDerivativeTransaction')):
+        shares = _num(tx, 'transactionAmounts/transactionShares/value')
+        price = _num(tx, 'transactionAmounts/transactionPricePerShare/value')
+        out.append({
+            'key': f"{accession}:{n}",
+            'accession': accession,
+            'source': 'form4',
+            'ticker': ticker,
+            'owner': owner,
+            'date': _text(tx, 'transactionDate/value')[:10],
+            'code': _text(tx, 'transactionCoding/transactionCode'),
+            'shares': shares,
+            'price': price,
+            'value': shares * price,
+            'link': link,
+        })
+    return out
+
+
+# The index page lists the XSL-rendered copy (…/xslF345X05/form4.xml); the raw XML sits one level up
+def form4_xml_url(index_content, base_url, headers=None):
+    return re.sub(r'/xsl[^/]+/', '/', primary_document(index_content, base_url, '4', headers))
+
+
+# === FINVIZ ROWS ===
+def parse_finviz_date(text, today=None):
+    today = today or date.today()
+    for fmt in ("%b %d '%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text.strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    try:
+        d = datetime.strptime(f"{text.strip()} {today.year}", "%b %d %Y").date()
+        return (d.replace(year=d.year - 1) if d > today else d).isoformat()
+    except ValueError:
+        return today.isoformat()
+
+
+# rows: parsing.InsiderTrade records (or their dicts) from the finviz collector
+def from_finviz(rows, today=None):
+    out = []
+    for row in rows:
+        row = row._asdict() if hasattr(row, '_asdict') else row
+        if row.get('value') is None:
+            continue
+        value = float(row['value'])
+        accession = normalize_accession(row.get('link', ''))
+        day = parse_finviz_date(row.get('date', ''), today)
+        owner = normalize_owner(row['owner'])
+        out.append({
+            'key': f"finviz:{row['ticker']}:{owner}:{day}:{value:.0f}",
+            'accession': accession,
+            'source': 'finviz',
+            'ticker': row['ticker'].upper(),
+            'owner': owner,
+            'date': day,
+            'code': 'P' if row.get('transaction') == 'Buy' else row.get('transaction', ''),
+            'shares': None,
+            'price': None,
+            'value': value,
+            'link': row.get('link', ''),
+        })
+    return out
+
+
+# === STORE + ROLLING AGGREGATES ===
+class InsiderClusterEngine:
+    def __init__(self, path=None, min_value=INSIDER_MIN_VALUE, min_buyers=INSIDER_MIN_BUYERS,
+                 window_days=INSIDER_WINDOW_DAYS, retention_days=INSIDER_RETENTION_DAYS):
+        self.min_value = min_value
+        self.min_buyers = min_buyers
+        self.window_days = window_days
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path or data_path('insiders.sqlite'), check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.active = {}
+        self._as_of = None
+        self._seed(date.today())
+
+    def _window_start(self, today):
+        return (today - timedelta(days=self.window_days)).isoformat()
+
+    # one grouped query over the window at startup; afterwards only touched tickers are recomputed
+    def _seed(self, today):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT DISTINCT ticker FROM transactions WHERE code = 'P' AND value >= ? AND date >= ?",
+                (self.min_value, self._window_start(today))).fetchall()
+        self._as_of = today
+        self._refresh({t for (t,) in rows}, today)
+
+    # Returns the tickers whose stored transactions actually changed
+    def ingest(self, transactions):
+        touched = set()
+        now = time.time()
+        with self._lock, self.db:
+            for tx in transactions:
+                if not tx['ticker'] or not tx['date']: continue
+                if tx['source'] == 'finviz' and tx['accession']:
+                    # the filing itself was (or will be) ingested from EDGAR – it wins
+                    if self.db.execute("SELECT 1 FROM transactions WHERE accession = ? AND source = 'form4' LIMIT 1",
+                                       (tx['accession'],)).fetchone():
+                        continue
+                elif tx['source'] == 'form4':
+                    self.db.execute("DELETE FROM transactions WHERE accession = ? AND source = 'finviz'", (tx['accession'],))
+                cur = self.db.execute(
+                    "INSERT OR IGNORE INTO transactions (key, accession, source, ticker, owner, date, code, shares, price, value, link, ingested) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tx['key'], tx['accession'], tx['source'], tx['ticker'], tx['owner'], tx['date'], tx['code'],
+                     tx['shares'], tx['price'], tx['value'], tx['link'], now))
+                if cur.rowcount:
+                    touched.add(tx['ticker'])
+        return touched
+
+    def _aggregate(self, ticker, today):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT owner, value, date, link FROM transactions "
+                "WHERE ticker = ? AND code = 'P' AND value >= ? AND date >= ? ORDER BY date, value DESC",
+                (ticker, self.min_value, self._window_start(today))).fetchall()
+        by_owner = {}
+        for owner, value, day, link in rows:
+            b = by_owner.setdefault(owner, {'owner': owner, 'value': 0.0, 'date': day, 'link': link})
+            b['value'] += value
+            b['date'], b['link'] = max(b['date'], day), link or b['link']
+        if len(by_owner) < self.min_buyers:
+            return None
+        buys = sorted(by_owner.values(), key=lambda b: b['value'], reverse=True)
+        return {
+            'ticker': ticker,
+            'buyers': len(buys),
+            'total_value': sum(b['value'] for b in buys),
+            'first_date': min(day for _, _, day, _ in rows),
+            'last_date': max(day for _, _, day, _ in rows),
+            'link': max(buys, key=lambda b: b['date'])['link'],
+            'buys': buys,
+        }
+
+    def _refresh(self, tickers, today):
+        for t in tickers:
+            cluster = self._aggregate(t, today)
+            if cluster:
+                self.active[t] = cluster
+            else:
+                self.active.pop(t, None)
+
+    # Ingest new transactions and return every cluster active in the window.
+    # Cost: the new rows, the touched tickers' window, and (once a day) the active set
+    def update(self, transactions, today=None):
+        today = today or date.today()
+        touched = self.ingest(transactions)
+        if today != self._as_of:
+            # the window moved: old buys may have aged out of active clusters
+            touched |= set(self.active)
+            self._as_of = today
+            self.prune(today)
+        self._refresh(touched, today)
+        return list(self.active.values())
+
+    def prune(self, today=None):
+        cutoff = ((today or date.today()) - timedelta(days=self.retention_days)).isoformat()
+        with self._lock, self.db:
+            self.db.execute("DELETE FROM transactions WHERE date < ?", (cutoff,))
+
+
+def to_signal(cluster):
+    return {
+        'type': 'Insider Cluster',
+        'ticker': cluster['ticker'],
+        'title': f"{cluster['buyers']} insiders bought ${cluster['total_value']:,.0f} ({cluster['first_date']} → {cluster['last_date']})",
+        'link': cluster['link'],
+        'insiders': [{'owner': b['owner'], 'value': f"${b['value']:,.0f}", 'date': b['date']} for b in cluster['buys']],
+        'total_value': cluster['total_value'],
+        'window': [cluster['first_date'], cluster['last_date']],
+        'filing_text': '',
+    }
+
+
+# === FORM 4 FEED ===
+# Polls EDGAR's Form 4 feed and fetches at most `max_per_poll` filings, oldest
+# first, so anything left over is still unseen (and newer) on the next poll.
+# A filing that fails is retried on later polls and skipped (marked processed)
+# after `max_attempts`; the others are returned and committed regardless.
+# poll() returns (transactions, pending); commit(pending) once the scan accepts it.
+class Form4Feed:
+    def __init__(self, ingester=None, max_per_poll=FORM4_MAX_PER_SCAN, max_attempts=FORM4_MAX_ATTEMPTS):
+        self.ingester = ingester or EdgarIngester(form='4')
+        self.max_per_poll = max_per_poll
+        self.max_attempts = max_attempts
+        self.attempts = {}      # accession -> failures so far (per process)
+
+    def _fetch(self, session, e, timeout):
+        r = session.get(e['link'], timeout=timeout)
+        r.raise_for_status()
+        x = session.get(form4_xml_url(r.content, e['link'], r.headers), timeout=timeout)
+        x.raise_for_status()
+        return parse_form4(x.content, e['accession'], e['link'])
+
+    def poll(self, session, timeout=10, deadline=None):
+        entries, cursor = self.ingester.poll(session, timeout=timeout, deadline=deadline)
+        # each filing is listed per party (Reporting / Issuer) – fetch it once
+        unique = list({e['accession']: e for e in reversed(entries) if e['accession']}.values())
+        picked = unique[:self.max_per_poll]
+        transactions, processed, retry = [], [], False
+        for e in picked:
+            if deadline and time.monotonic() > deadline:
+                break
+            try:
+                transactions.extend(self._fetch(session, e, timeout))
+            except Exception as err:
+                failures = self.attempts[e['accession']] = self.attempts.get(e['accession'], 0) + 1
+                gave_up = failures >= self.max_attempts
+                log.warning("Form 4 %s failed (attempt %d): %s", e['accession'], failures, err)
+                metrics.inc('form4_errors_total', action='skipped' if gave_up else 'retry')
+                if not gave_up:
+                    retry = True
+                    continue
+            self.attempts.pop(e['accession'], None)
+            processed.append(e['accession'])
+        done = set(processed)
+        if retry:
+            # a failed filing may be older than ones that succeeded – hold the mark so it is polled again
+            cursor = dict(cursor or {'start': 0}, anchor=None)
+        elif cursor is not None and len(done) < len(unique):
+            # unfetched filings sit above the cursor too – page through them rather than jump
+            cursor = dict(cursor, anchor=None)
+        return transactions, ([e for e in entries if e['accession'] in done], cursor)
+
+    def commit(self, pending):
+        self.ingester.commit(*pending)
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine():
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = InsiderClusterEngine()
+    return _ENGINE
@@ -0,0 +1,209 @@
+# market_data.py – BATCHED MARKET DATA WITH SHARED PER-TICKER SNAPSHOTS
+# One bulk yf.download per scan fills price history for every ticker; chart,
+# options and peer views read the same cached snapshot (history, option
+# expiries, chains), each kind with its own TTL. History and expiries are also
+# pickled to DATA_DIR so a restarted page starts warm; failed lookups never are.
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+import metrics
+from config import data_path
+
+TTLS = {
+    'history': 300,
+    'expiries': 3600,
+    'chain': 300,
+    'failed': 300,           # negative entries: a failed lookup isn't retried on every render
+}
+HISTORY_PERIOD = '1mo'
+PERIOD_ROWS = {'1d': 1, '5d': 5}
+PERSIST_KINDS = ('history', 'expiries')
+SNAPSHOT_SAVE_INTERVAL = 60
+QUOTE_CHUNK = 400
+
+
+# yfinance takes most of a second to import – only pay for it on a real fetch
+def _yf():
+    import yfinance
+    return yfinance
+
+
+class MarketData:
+    def __init__(self, ttls=None, path=None):
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.path = path
+        self._cache = {}
+        self._tickers = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0
+
+    # === CACHE ===
+    def _get(self, kind, key):
+        hit = self._cache.get((kind, key))
+        if hit and time.time() - hit[0] < self.ttls[kind]:
+            metrics.inc('cache_requests_total', cache=f'market_{kind}', result='hit')
+            return hit[1]
+        metrics.inc('cache_requests_total', cache=f'market_{kind}', result='miss')
+        return None
+
+    # failures are remembered briefly, in memory only – never for the full TTL, never on disk
+    def _failed(self, kind, key):
+        return self._get('failed', (kind, key)) is not None
+
+    def _put(self, kind, key, value):
+        self._cache[(kind, key)] = (time.time(), value)
+        if kind in PERSIST_KINDS:
+            self._dirty = True
+        return value
+
+    # === DISK SNAPSHOT ===
+    # Entries keep their fetch time, so TTLs still apply after a reload
+    def _snapshot_path(self):
+        return self.path or data_path('market_snapshot.pkl')
+
+    def load(self):
+        try:
+            with open(self._snapshot_path(), 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+            return 0
+        now = time.time()
+        fresh = {k: v for k, v in snapshot.items() if k[0] in PERSIST_KINDS and now - v[0] < self.ttls[k[0]]}
+        with self._lock:
+            for k, v in fresh.items():
+                if k not in self._cache or self._cache[k][0] < v[0]:
+                    self._cache[k] = v
+        return len(fresh)
+
+    def save(self, force=False):
+        if not self._dirty or (not force and time.time() - self._saved_at < SNAPSHOT_SAVE_INTERVAL):
+            return False
+        now = time.time()
+        snapshot = {k: v for k, v in list(self._cache.items()) if k[0] in PERSIST_KINDS and now - v[0] < self.ttls[k[0]]}
+        path = self._snapshot_path()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            return False
+        self._dirty, self._saved_at = False, now
+        return True
+
+    def _ticker(self, ticker):
+        with self._lock:
+            if ticker not in self._tickers:
+                self._tickers[ticker] = _yf().Ticker(ticker)
+            return self._tickers[ticker]
+
+    # === BULK HISTORY ===
+    # a ticker the download failed for (or returned nothing for) is only marked failed
+    def prefetch(self, tickers):
+        missing = sorted({t for t in tickers if t and self._get('history', t) is None and not self._failed('history', t)})
+        if not missing:
+            return
+        try:
+            with metrics.timer('yfinance_call_seconds', call='download'):
+                df = _yf().download(missing, period=HISTORY_PERIOD, group_by='ticker', auto_adjust=False, threads=True, progress=False)
+            raised = False
+        except Exception:
+            df, raised = pd.DataFrame(), True
+        multi = isinstance(df.columns, pd.MultiIndex)
+        for t in missing:
+            if multi:
+                hist = df[t] if t in df.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                hist = df
+            hist = hist.dropna(how='all')
+            if hist.empty:
+                if not raised:
+                    # yf.download reports per-ticker failures as missing columns, not exceptions
+                    metrics.inc('yfinance_empty_total', call='download')
+                self._put('failed', ('history', t), True)
+            else:
+                self._put('history', t, hist)
+        self.save()
+
+    # === BULK QUOTES (not cached) ===
+    # Last close, average volume and 1-month return for a whole universe, in
+    # chunked yf.download calls – used by the scheduled peer-index refresh.
+    def quotes(self, tickers, chunk_size=QUOTE_CHUNK):
+        tickers = sorted(set(tickers))
+        out = {}
+        for i in range(0, len(tickers), chunk_size):
+            chunk = tickers[i:i + chunk_size]
+            try:
+                with metrics.timer('yfinance_call_seconds', call='quotes'):
+                    df = _yf().download(chunk, period=HISTORY_PERIOD, group_by='ticker', auto_adjust=False, threads=True, progress=False)
+            except Exception:
+                continue
+            multi = isinstance(df.columns, pd.MultiIndex)
+            present = set(df.columns.get_level_values(0)) if multi else set(chunk)
+            for t in chunk:
+                if t not in present:
+                    continue
+                hist = (df[t] if multi else df).dropna(subset=['Close'])
+                if hist.empty:
+                    continue
+                close = hist['Close']
+                out[t] = {
+                    'price': float(close.iloc[-1]),
+                    'avg_volume': float(hist['Volume'].mean()),
+                    'return_1mo': float(close.iloc[-1] / close.iloc[0] - 1) if close.iloc[0] else None,
+                }
+        return out
+
+    # === SNAPSHOT READS ===
+    def history(self, ticker, period='5d'):
+        hist = self._get('history', ticker)
+        if hist is None:
+            self.prefetch([ticker])
+            hist = self._get('history', ticker)
+        if hist is None:
+            return pd.DataFrame()
+        rows = PERIOD_ROWS.get(period)
+        return hist.tail(rows) if rows else hist
+
+    def price(self, ticker):
+        hist = self.history(ticker, '1d')
+        return None if hist.empty else float(hist['Close'].iloc[-1])
+
+    def option_expiries(self, ticker):
+        expiries = self._get('expiries', ticker)
+        if expiries is None:
+            if self._failed('expiries', ticker):
+                return ()
+            try:
+                with metrics.timer('yfinance_call_seconds', call='options'):
+                    expiries = tuple(self._ticker(ticker).options)
+            except Exception:
+                self._put('failed', ('expiries', ticker), True)
+                return ()
+            self._put('expiries', ticker, expiries)
+        return expiries
+
+    def option_chain(self, ticker, expiry):
+        chain = self._get('chain', (ticker, expiry))
+        if chain is None:
+            with metrics.timer('yfinance_call_seconds', call='option_chain'):
+                chain = self._ticker(ticker).option_chain(expiry)
+            self._put('chain', (ticker, expiry), chain)
+        return chain
+
+
+_MARKET = None
+_MARKET_LOCK = threading.Lock()
+
+
+def get_market_data():
+    global _MARKET
+    with _MARKET_LOCK:
+        if _MARKET is None:
+            _MARKET = MarketData()
+    return _MARKET
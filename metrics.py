@@ -0,0 +1,167 @@
+# metrics.py – IN-PROCESS METRICS: COUNTERS, GAUGES, LATENCY HISTOGRAMS + PROMETHEUS / JSON-LINES EXPORT
+# One lock and one dict update per observation, so it stays on in production.
+# Names follow Prometheus conventions (…_total counters, …_seconds histograms);
+# the scanner exports a snapshot after every scan for the diagnostics panel.
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import data_path
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+JSONL_MAX_BYTES = int(os.getenv('METRICS_JSONL_MAX_BYTES', 5 * 1024 * 1024))
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}    # key → [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    # === RECORD ===
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+    # Times the block into histogram `name`; an exception also bumps `errors_total{op=name}`
+    @contextmanager
+    def timer(self, name, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('errors_total', op=name, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # === SNAPSHOT ===
+    def snapshot(self):
+        with self._lock:
+            counters = [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self.counters.items()]
+            gauges = [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self.gauges.items()]
+            histograms = [{'name': n, 'labels': dict(l), 'counts': list(h[0]), 'sum': h[1], 'count': h[2]}
+                          for (n, l), h in self.histograms.items()]
+        return {'ts': time.time(), 'pid': os.getpid(), 'buckets': list(self.buckets),
+                'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+# === SUMMARIES ===
+# Upper bound of the bucket holding the q-quantile (what Prometheus would interpolate towards)
+def quantile(hist, buckets, q):
+    if not hist['count']:
+        return None
+    target = q * hist['count']
+    seen = 0
+    for bound, n in zip(list(buckets) + [float('inf')], hist['counts']):
+        seen += n
+        if seen >= target:
+            return bound
+    return float('inf')
+
+
+# label values only: backslash first, then quote and newline (exposition format)
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=None):
+    items = dict(labels, **(extra or {}))
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in sorted(items.items())) + '}'
+
+
+def to_prometheus(snap):
+    lines, typed = [], set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for c in sorted(snap['counters'], key=lambda c: c['name']):
+        declare(c['name'], 'counter')
+        lines.append(f"{c['name']}{_labels(c['labels'])} {c['value']}")
+    for g in sorted(snap['gauges'], key=lambda g: g['name']):
+        declare(g['name'], 'gauge')
+        lines.append(f"{g['name']}{_labels(g['labels'])} {g['value']}")
+    for h in sorted(snap['histograms'], key=lambda h: h['name']):
+        declare(h['name'], 'histogram')
+        cumulative = 0
+        for bound, n in zip(snap['buckets'] + ['+Inf'], h['counts']):
+            cumulative += n
+            lines.append(f"{h['name']}_bucket{_labels(h['labels'], {'le': bound})} {cumulative}")
+        lines.append(f"{h['name']}_sum{_labels(h['labels'])} {h['sum']}")
+        lines.append(f"{h['name']}_count{_labels(h['labels'])} {h['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+# === EXPORT (metrics.prom for node_exporter's textfile collector, metrics.jsonl history) ===
+def _atomic_write(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def export(registry=None, prefix='metrics'):
+    snap = (registry or REGISTRY).snapshot()
+    _atomic_write(data_path(f'{prefix}.prom'), to_prometheus(snap))
+    _atomic_write(data_path(f'{prefix}.json'), json.dumps(snap))
+    jsonl = data_path(f'{prefix}.jsonl')
+    try:
+        if os.path.getsize(jsonl) > JSONL_MAX_BYTES:
+            os.replace(jsonl, jsonl + '.1')
+    except OSError:
+        pass
+    with open(jsonl, 'a') as f:
+        f.write(json.dumps(snap) + '\n')
+    return snap
+
+
+def load_snapshot(prefix='metrics'):
+    try:
+        with open(data_path(f'{prefix}.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# === DEFAULT REGISTRY ===
+REGISTRY = Registry()
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set
+observe = REGISTRY.observe
+timer = REGISTRY.timer
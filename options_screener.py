@@ -0,0 +1,207 @@
+# options_screener.py – VECTORIZED OPTIONS SCREENER (SPREADS, CSPs, TAKEOVER CALLS)
+# Builds every candidate for each expiry in one NumPy pass, scores them on
+# expected return on capital at risk (chance of finishing past breakeven ×
+# reward/risk) and liquidity, and returns the top N. The score means the same
+# thing for every strategy, so one sort ranks them all.
+from datetime import date
+from math import erf
+
+import numpy as np
+import pandas as pd
+
+from market_data import get_market_data
+
+MAX_EXPIRIES = 3
+TOP_N = 5
+MAX_SPREAD_WIDTH = 0.25      # of spot
+LONG_STRIKE_BAND = (0.80, 1.10)
+PUT_STRIKE_BAND = (0.70, 1.00)
+CALL_STRIKE_BAND = (1.00, 1.30)
+TAKEOVER_PREMIUM = 0.30      # target move for merger-arb style calls
+MIN_OPEN_INTEREST = 10
+DEFAULT_VOL = 0.50           # when the chain carries no implied volatility
+
+STRATEGIES = ('bull_call_spread', 'cash_secured_put', 'takeover_call')
+LABELS = {
+    'bull_call_spread': 'Bull Call Spread',
+    'cash_secured_put': 'Cash-Secured Put',
+    'takeover_call': 'Takeover Call',
+}
+
+
+# === CHAIN PREP ===
+def _prep(chain):
+    if chain is None or chain.empty:
+        return None
+    df = chain.sort_values('strike')
+    bid = df['bid'].to_numpy(float) if 'bid' in df else np.zeros(len(df))
+    ask = df['ask'].to_numpy(float) if 'ask' in df else np.zeros(len(df))
+    last = df['lastPrice'].to_numpy(float)
+    bid, ask = np.nan_to_num(bid), np.nan_to_num(ask)
+    quoted = (bid > 0) & (ask > 0)
+    mid = np.where(quoted, (bid + ask) / 2, np.nan_to_num(last))
+    spread = np.where(quoted & (mid > 0), (ask - bid) / np.where(mid > 0, mid, 1), 1.0)
+    oi = np.nan_to_num(df['openInterest'].to_numpy(float)) if 'openInterest' in df else np.zeros(len(df))
+    vol = np.nan_to_num(df['volume'].to_numpy(float)) if 'volume' in df else np.zeros(len(df))
+    iv = df['impliedVolatility'].to_numpy(float) if 'impliedVolatility' in df else np.full(len(df), np.nan)
+    iv = np.where(np.isfinite(iv) & (iv > 0.01), iv, DEFAULT_VOL)
+    return {'strike': df['strike'].to_numpy(float), 'mid': mid, 'spread': spread, 'oi': oi, 'vol': vol, 'iv': iv}
+
+
+# liquidity in [0, 1]: open interest/volume depth, penalised by bid-ask width
+def _liquidity(oi, vol, spread):
+    depth = np.minimum(1.0, np.log1p(oi + vol) / np.log1p(5000))
+    return depth * np.clip(1 - spread, 0, 1)
+
+
+_norm_cdf = np.vectorize(lambda x: 0.5 * (1 + erf(x / 2 ** 0.5)), otypes=[float])
+
+
+def _years_to(expiry, today=None):
+    try:
+        days = (date.fromisoformat(str(expiry)) - (today or date.today())).days
+    except ValueError:
+        days = 30
+    return max(days, 1) / 365
+
+
+# Every strategy here is bullish: profit means finishing above breakeven.
+# Lognormal, driftless, at the chain's implied vol – a CSP's cushion below spot
+# raises it, a debit trade's breakeven above spot lowers it.
+def _pop(spot, breakeven, iv, years):
+    sd = iv * np.sqrt(years)
+    return _norm_cdf((np.log(spot / np.maximum(breakeven, 1e-9)) - sd ** 2 / 2) / sd)
+
+
+# expected return on capital at risk, discounted for thin or wide markets
+def _score(reward_risk, pop, liquidity):
+    return pop * np.clip(reward_risk, 0, 20) * (0.25 + 0.75 * liquidity)
+
+
+# target: price the profit is counted at (default breakeven – takeover calls use the deal price)
+def _frame(strategy, expiry, long_k, short_k, cost, breakeven, max_profit, max_loss, spot, liquidity, iv, target=None):
+    rr = np.where(max_loss > 0, max_profit / np.where(max_loss > 0, max_loss, 1), 0)
+    be_pct = (breakeven - spot) / spot
+    pop = _pop(spot, breakeven if target is None else target, iv, _years_to(expiry))
+    return pd.DataFrame({
+        'strategy': strategy, 'expiry': expiry,
+        'long_strike': long_k, 'short_strike': short_k,
+        'cost': cost, 'breakeven': breakeven,
+        'max_profit': max_profit, 'max_loss': max_loss,
+        'reward_risk': rr, 'breakeven_pct': be_pct, 'pop': pop,
+        'liquidity': liquidity, 'score': _score(rr, pop, liquidity),
+    })
+
+
+# === STRATEGY BUILDERS ===
+def bull_call_spreads(calls, spot, expiry):
+    c = _prep(calls)
+    if c is None:
+        return None
+    k, p = c['strike'], c['mid']
+    i, j = np.triu_indices(len(k), 1)          # every long < short pair
+    debit = p[i] - p[j]
+    width = k[j] - k[i]
+    max_profit = width - debit
+    ok = (debit > 0) & (max_profit > 0) & (width <= MAX_SPREAD_WIDTH * spot) \
+        & (k[i] >= LONG_STRIKE_BAND[0] * spot) & (k[i] <= LONG_STRIKE_BAND[1] * spot) \
+        & (np.minimum(c['oi'][i], c['oi'][j]) >= MIN_OPEN_INTEREST)
+    i, j = i[ok], j[ok]
+    liq = np.minimum(_liquidity(c['oi'][i], c['vol'][i], c['spread'][i]), _liquidity(c['oi'][j], c['vol'][j], c['spread'][j]))
+    return _frame('bull_call_spread', expiry, k[i], k[j], debit[ok], k[i] + debit[ok], max_profit[ok], debit[ok], spot, liq, c['iv'][i])
+
+
+def cash_secured_puts(puts, spot, expiry):
+    c = _prep(puts)
+    if c is None:
+        return None
+    k, p = c['strike'], c['mid']
+    ok = (p > 0) & (k >= PUT_STRIKE_BAND[0] * spot) & (k <= PUT_STRIKE_BAND[1] * spot) & (c['oi'] >= MIN_OPEN_INTEREST)
+    k, p = k[ok], p[ok]
+    liq = _liquidity(c['oi'][ok], c['vol'][ok], c['spread'][ok])
+    return _frame('cash_secured_put', expiry, np.nan, k, -p, k - p, p, k - p, spot, liq, c['iv'][ok])
+
+
+def takeover_calls(calls, spot, expiry):
+    c = _prep(calls)
+    if c is None:
+        return None
+    k, p = c['strike'], c['mid']
+    ok = (p > 0) & (k >= CALL_STRIKE_BAND[0] * spot) & (k <= CALL_STRIKE_BAND[1] * spot) & (c['oi'] >= MIN_OPEN_INTEREST)
+    k, p = k[ok], p[ok]
+    payoff = np.maximum(0, spot * (1 + TAKEOVER_PREMIUM) - k) - p
+    liq = _liquidity(c['oi'][ok], c['vol'][ok], c['spread'][ok])
+    return _frame('takeover_call', expiry, k, np.nan, p, k + p, payoff, p, spot, liq, c['iv'][ok],
+                  target=spot * (1 + TAKEOVER_PREMIUM))
+
+
+BUILDERS = {
+    'bull_call_spread': lambda chain, spot, expiry: bull_call_spreads(chain.calls, spot, expiry),
+    'cash_secured_put': lambda chain, spot, expiry: cash_secured_puts(chain.puts, spot, expiry),
+    'takeover_call': lambda chain, spot, expiry: takeover_calls(chain.calls, spot, expiry),
+}
+
+
+# === SCREEN ===
+def screen(ticker, top_n=TOP_N, max_expiries=MAX_EXPIRIES, strategies=STRATEGIES, md=None):
+    md = md or get_market_data()
+    spot = md.price(ticker)
+    expiries = md.option_expiries(ticker)
+    if not spot or not expiries:
+        return pd.DataFrame()
+    # skip the front expiry when there's a choice – it's usually days away
+    picked = expiries[1:1 + max_expiries] if len(expiries) > 1 else expiries[:max_expiries]
+    frames = []
+    for expiry in picked:
+        try:
+            chain = md.option_chain(ticker, expiry)
+        except Exception:
+            continue
+        for name in strategies:
+            frames.append(BUILDERS[name](chain, spot, expiry))
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    out = pd.concat(frames, ignore_index=True)
+    out = out[out['max_profit'] > 0]
+    out.insert(0, 'ticker', ticker)
+    out['spot'] = spot
+    return out.nlargest(top_n, 'score').reset_index(drop=True)
+
+
+# === DISPLAY ===
+def to_card(row):
+    t, expiry = row['ticker'], row['expiry']
+    label = LABELS[row['strategy']]
+    if row['strategy'] == 'bull_call_spread':
+        buy = f"Buy {t} ${row['long_strike']:g} Call"
+        sell = f"Sell {t} ${row['short_strike']:g} Call"
+        steps = [f"Buy to Open → `${row['long_strike']:g}` Call", f"Sell to Open → `${row['short_strike']:g}` Call", "Confirm spread"]
+        risk = row['max_loss'] * 100
+    elif row['strategy'] == 'cash_secured_put':
+        buy = "—"
+        sell = f"Sell {t} ${row['short_strike']:g} Put"
+        steps = [f"Sell to Open → `${row['short_strike']:g}` Put", f"Keep ${row['short_strike'] * 100:,.0f} cash as collateral"]
+        risk = row['max_loss'] * 100
+    else:
+        buy = f"Buy {t} ${row['long_strike']:g} Call"
+        sell = "—"
+        steps = [f"Buy to Open → `${row['long_strike']:g}` Call"]
+        risk = row['max_loss'] * 100
+    instructions = "\n".join([f"1. Open Wealthsimple → Search `{t}`", f"2. Tap **Options** → Select **{expiry}**"]
+                             + [f"{n}. {s}" for n, s in enumerate(steps, 3)])
+    cost = row['cost']
+    profit_label = f"Payoff at +{TAKEOVER_PREMIUM:.0%} deal premium" if row['strategy'] == 'takeover_call' else "Max Profit"
+    return {
+        'type': label,
+        'buy': buy,
+        'sell': sell,
+        'expiry': expiry,
+        'debit': f"${cost:.2f}" if cost >= 0 else f"${-cost:.2f} credit",
+        'breakeven': f"${row['breakeven']:.2f}",
+        'max_profit': f"${row['max_profit']:.2f}",
+        'max_profit_label': profit_label,
+        'risk': f"${risk:.0f}",
+        'reward_risk': f"{row['reward_risk']:.2f}",
+        'instructions': instructions,
+    }
@@ -0,0 +1,164 @@
+# parsing.py – SELECTIVE HTML PARSING FOR THE SCRAPED PAGES → TYPED RECORDS
+# Every page is parsed straight from the response bytes with a SoupStrainer, so
+# only the target elements become a tree (lxml when installed, else the stdlib
+# parser). All selectors live in SELECTORS below; a page that yields zero
+# records raises LayoutError instead of quietly producing no signals.
+from typing import NamedTuple, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import metrics
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+
+# === SELECTORS (bump 'version' with every layout fix; it's in the error text) ===
+SELECTORS = {
+    'yahoo_news': {
+        'version': 1,
+        'strain': ['a', 'h3'],          # headline <h3> and the <a> that wraps it
+        'headline': ('h3', {'class': 'Mb(5px)'}),
+        'base_url': "https://finance.yahoo.com",
+    },
+    'finviz_insiders': {
+        'version': 1,
+        'strain': ('table', {'class': 'body-table'}),
+        'header_rows': 1,
+        'min_cells': 10,
+        'columns': {'ticker': 1, 'owner': 2, 'relationship': 3, 'date': 4, 'transaction': 5,
+                    'cost': 6, 'shares': 7, 'value': 8, 'shares_total': 9, 'form4': 10},
+    },
+    'edgar_index': {
+        'version': 1,
+        'strain': ('table', {'class': 'tableFile'}),
+        'header_rows': 1,
+        'min_cells': 4,
+        'columns': {'seq': 0, 'description': 1, 'document': 2, 'type': 3},
+    },
+}
+
+
+class LayoutError(ValueError):
+    def __init__(self, page, detail="no records matched"):
+        sel = SELECTORS[page]
+        super().__init__(f"{page} selectors v{sel['version']}: {detail} – page layout changed?")
+        self.page = page
+        metrics.inc('parse_layout_errors_total', page=page)
+
+
+# === RECORDS ===
+class Headline(NamedTuple):
+    title: str
+    link: str
+
+
+class InsiderTrade(NamedTuple):
+    ticker: str
+    owner: str
+    relationship: str
+    date: str
+    transaction: str
+    cost: Optional[float]
+    shares: Optional[float]
+    value: Optional[float]
+    shares_total: Optional[float]
+    link: str
+
+
+class FilingDocument(NamedTuple):
+    seq: str
+    description: str
+    url: str
+    type: str
+
+
+# === HELPERS ===
+# charset only when the server declared one – otherwise let the parser sniff the bytes
+def _charset(headers):
+    ctype = (headers or {}).get('Content-Type', '')
+    return ctype.split('charset=', 1)[1].split(';')[0].strip() if 'charset=' in ctype else None
+
+
+def _soup(content, page, headers=None):
+    strain = SELECTORS[page]['strain']
+    strainer = SoupStrainer(strain) if isinstance(strain, list) else SoupStrainer(strain[0], attrs=strain[1])
+    return BeautifulSoup(content, PARSER, parse_only=strainer, from_encoding=_charset(headers))
+
+
+def _number(text):
+    text = text.replace('$', '').replace(',', '').strip()
+    try:
+        return float(text) if text else None
+    except ValueError:
+        return None
+
+
+def _rows(soup, sel):
+    for tr in soup.find_all('tr')[sel['header_rows']:]:
+        cells = tr.find_all('td', recursive=False) or tr.find_all('td')
+        if len(cells) >= sel['min_cells']:
+            yield cells
+
+
+# === PAGES ===
+# content: response bytes; headers: response headers (for the declared charset)
+def parse_yahoo_news(content, headers=None):
+    sel = SELECTORS['yahoo_news']
+    soup = _soup(content, 'yahoo_news', headers)
+    name, attrs = sel['headline']
+    out = []
+    for h in soup.find_all(name, attrs=attrs):
+        a = h.find_parent('a')
+        link = urljoin(sel['base_url'], a['href']) if a is not None and a.get('href') else ""
+        out.append(Headline(h.get_text(), link))
+    if not out:
+        raise LayoutError('yahoo_news')
+    return out
+
+
+def parse_finviz_insiders(content, headers=None):
+    sel = SELECTORS['finviz_insiders']
+    col = sel['columns']
+    out = []
+    for cells in _rows(_soup(content, 'finviz_insiders', headers), sel):
+        text = [c.get_text(strip=True) for c in cells[:col['form4']]]
+        form4 = cells[col['form4']].find('a') if len(cells) > col['form4'] else None
+        out.append(InsiderTrade(
+            ticker=text[col['ticker']],
+            owner=text[col['owner']],
+            relationship=text[col['relationship']],
+            date=text[col['date']],
+            transaction=text[col['transaction']],
+            cost=_number(text[col['cost']]),
+            shares=_number(text[col['shares']]),
+            value=_number(text[col['value']]),
+            shares_total=_number(text[col['shares_total']]),
+            link=form4['href'] if form4 is not None and form4.get('href') else '',
+        ))
+    if not out:
+        raise LayoutError('finviz_insiders')
+    return out
+
+
+# EDGAR "-index.htm" document table; inline-XBRL links are unwrapped to the document itself
+def parse_filing_index(content, base_url, headers=None):
+    sel = SELECTORS['edgar_index']
+    col = sel['columns']
+    out = []
+    for cells in _rows(_soup(content, 'edgar_index', headers), sel):
+        a = cells[col['document']].find('a')
+        if a is None or not a.get('href'): continue
+        out.append(FilingDocument(
+            seq=cells[col['seq']].get_text(strip=True),
+            description=cells[col['description']].get_text(strip=True),
+            url=urljoin(base_url, a['href'].replace('/ix?doc=', '')),
+            type=cells[col['type']].get_text(strip=True).upper(),
+        ))
+    if not out:
+        raise LayoutError('edgar_index')
+    return out
@@ -0,0 +1,316 @@
+# peers.py – PRECOMPUTED INDUSTRY PEER INDEX (SEC SIC CODE + MARKET CAP)
+#   python -m peers build        # SIC code per company from the submissions API (resumable), then refresh
+#   python -m peers refresh      # bulk metrics only: shares / EPS frames + one chunked price download
+# The index is one gzipped TSV row per company in DATA_DIR, loaded once into
+# memory. Peers share the SIC industry (widening to the 3- then 2-digit group)
+# and are ranked by distance in log market cap, so a lookup never touches the
+# network. The scanner reruns the metrics refresh every PEER_REFRESH_INTERVAL.
+import argparse
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import NamedTuple, Optional
+
+import requests
+
+import metrics
+from config import PEER_COUNT, data_path
+
+log = logging.getLogger(__name__)
+
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik:010d}.json"
+FRAMES_URL = "https://data.sec.gov/api/xbrl/frames/{concept}/{period}.json"
+SHARES_CONCEPT = 'dei/EntityCommonStockSharesOutstanding/shares'
+EPS_CONCEPT = 'us-gaap/EarningsPerShareDiluted/USD-per-shares'
+FILING_LAG_DAYS = 75         # a quarter's frame fills up once its 10-Qs are in
+SIC_WORKERS = 4              # enough to keep the SEC rate limiter busy
+SAVE_EVERY = 500
+GROUP_DIGITS = (4, 3, 2)     # industry → industry group → major group
+FAILURE_BACKOFF = 1800       # a refresh that got no data is retried after this, not every scan
+# SIC divisions by major group (first two digits)
+SIC_DIVISIONS = ((10, 'Agriculture, Forestry & Fishing'), (15, 'Mining'), (18, 'Construction'),
+                 (40, 'Manufacturing'), (50, 'Transportation & Utilities'), (52, 'Wholesale Trade'),
+                 (60, 'Retail Trade'), (68, 'Finance, Insurance & Real Estate'), (90, 'Services'),
+                 (100, 'Public Administration'))
+
+
+class Peer(NamedTuple):
+    ticker: str
+    cik: int
+    sic: str
+    shares: Optional[float] = None
+    eps: Optional[float] = None
+    price: Optional[float] = None
+    avg_volume: Optional[float] = None
+    return_1mo: Optional[float] = None
+
+    @property
+    def market_cap(self):
+        return self.shares * self.price if self.shares and self.price else None
+
+    @property
+    def pe(self):
+        return self.price / self.eps if self.price and self.eps and self.eps > 0 else None
+
+
+def _cell(value):
+    return '' if value is None else repr(value) if isinstance(value, float) else str(value)
+
+
+def _float(text):
+    return float(text) if text else None
+
+
+class PeerIndex:
+    def __init__(self, path=None):
+        self.path = path or data_path('peers.tsv.gz')
+        self.meta_path = self.path + '.meta.json'
+        self.meta = {}
+        self.by_ticker = {}
+        self.groups = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.load()
+
+    # === DISK ===
+    def load(self):
+        try:
+            mtime = os.path.getmtime(self.meta_path)
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            rows = []
+            with gzip.open(self.path, 'rt') as f:
+                for line in f:
+                    ticker, cik, sic, *nums = line.rstrip('\n').split('\t')
+                    rows.append(Peer(ticker, int(cik), sic, *map(_float, nums)))
+        except (OSError, ValueError, TypeError):
+            return False
+        self._set_rows(rows)
+        self.meta, self._mtime = meta, mtime
+        return True
+
+    # the page and the scanner are separate processes – pick up the scanner's refresh
+    def reload_if_changed(self):
+        try:
+            mtime = os.path.getmtime(self.meta_path)
+        except OSError:
+            return False
+        return mtime != self._mtime and self.load()
+
+    def save(self):
+        with self._lock:
+            tmp = self.path + '.tmp'
+            with gzip.open(tmp, 'wt') as f:
+                f.writelines('\t'.join(map(_cell, p)) + '\n' for p in self.by_ticker.values())
+            os.replace(tmp, self.path)
+            # meta last: its mtime marks a complete write for reload_if_changed
+            tmp = self.meta_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.meta, f)
+            os.replace(tmp, self.meta_path)
+            self._mtime = os.path.getmtime(self.meta_path)
+
+    def _set_rows(self, rows):
+        by_ticker = {p.ticker: p for p in rows}
+        groups = {}
+        for p in by_ticker.values():
+            if p.sic:
+                for digits in GROUP_DIGITS:
+                    groups.setdefault((digits, p.sic[:digits]), []).append(p)
+        self.by_ticker, self.groups = by_ticker, groups
+
+    def rows(self):
+        return list(self.by_ticker.values())
+
+    def __len__(self):
+        return len(self.by_ticker)
+
+    def is_stale(self, interval):
+        now = time.time()
+        return (bool(self.by_ticker) and now - self.meta.get('metrics_at', 0) > interval
+                and now - self.meta.get('metrics_failed_at', 0) > FAILURE_BACKOFF)
+
+    # === LOOKUPS ===
+    def get(self, ticker):
+        return self.by_ticker.get(ticker)
+
+    def industry(self, ticker):
+        p = self.by_ticker.get(ticker)
+        return self.meta.get('sic_descriptions', {}).get(p.sic) if p and p.sic else None
+
+    def sector(self, ticker):
+        p = self.by_ticker.get(ticker)
+        if not p or not p.sic[:2].isdigit():
+            return None
+        return next((name for bound, name in SIC_DIVISIONS if int(p.sic[:2]) < bound), None)
+
+    # Closest in size within the same SIC code first, then the wider groups fill the rest
+    def nearest(self, ticker, n=PEER_COUNT):
+        me = self.by_ticker.get(ticker)
+        if me is None or not me.sic:
+            return []
+        size = math.log(me.market_cap) if me.market_cap else None
+
+        def distance(p):
+            if p.market_cap is None or size is None:
+                return math.inf
+            return abs(math.log(p.market_cap) - size)
+
+        picked, seen = [], {ticker}
+        for digits in GROUP_DIGITS:
+            group = [p for p in self.groups.get((digits, me.sic[:digits]), ()) if p.ticker not in seen]
+            for p in heapq.nsmallest(n - len(picked), group, key=distance):
+                picked.append(p)
+                seen.add(p.ticker)
+            if len(picked) >= n:
+                break
+        return picked
+
+
+# === OFFLINE BUILD: SIC CODES ===
+def fetch_sic(session, cik):
+    r = session.get(SUBMISSIONS_URL.format(cik=cik), timeout=15)
+    r.raise_for_status()
+    j = r.json()
+    return j.get('sic') or '', j.get('sicDescription') or ''
+
+
+# Companies already classified keep their SIC code; an interrupted build resumes where it stopped
+def build(index=None, session=None, limit=None):
+    from cik_index import get_index
+    from http_client import get_session
+    index = index or get_peer_index()
+    session = session or get_session()
+    companies = get_index().by_cik
+    by_cik = {p.cik: p for p in index.rows() if p.cik in companies}
+    rows = {cik: by_cik[cik]._replace(ticker=t) if cik in by_cik else Peer(t, cik, '') for cik, t in companies.items()}
+    todo = [cik for cik in companies if cik not in by_cik][:limit]
+    descriptions = index.meta.setdefault('sic_descriptions', {})
+    log.info("peer index: %d companies, %d to classify", len(rows), len(todo))
+
+    def classify(cik):
+        try:
+            return fetch_sic(session, cik)
+        except (requests.RequestException, ValueError):
+            metrics.inc('peer_index_errors_total', stage='sic')
+            return None
+
+    done = 0
+    with ThreadPoolExecutor(SIC_WORKERS) as pool:
+        for cik, result in zip(todo, pool.map(classify, todo)):
+            if result is None:
+                rows.pop(cik)       # retried on the next build
+                continue
+            sic, description = result
+            rows[cik] = rows[cik]._replace(sic=sic)
+            if sic and description:
+                descriptions[sic] = description
+            done += 1
+            if done % SAVE_EVERY == 0:
+                index._set_rows(rows.values())
+                index.save()
+                log.info("peer index: %d / %d classified", done, len(todo))
+    index._set_rows(rows.values())
+    index.meta['built_at'] = time.time()
+    index.save()
+    return refresh_metrics(index, session)
+
+
+# === SCHEDULED REFRESH: SIZE + VALUATION IN BULK ===
+def _instant_periods(today):
+    d = today - timedelta(days=FILING_LAG_DAYS)
+    year, quarter = d.year, (d.month - 1) // 3 + 1
+    out = []
+    for _ in range(3):
+        out.append(f"CY{year}Q{quarter}I")
+        year, quarter = (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+    return out
+
+
+def _annual_periods(today):
+    year = (today - timedelta(days=FILING_LAG_DAYS)).year - 1
+    return [f"CY{year}", f"CY{year - 1}"]
+
+
+# One request per period returns the value for every filer; newer periods win
+def fetch_frame(session, concept, periods):
+    values = {}
+    for period in reversed(periods):
+        try:
+            r = session.get(FRAMES_URL.format(concept=concept, period=period), timeout=30)
+            if r.status_code == 404:
+                continue
+            r.raise_for_status()
+            values.update({int(row['cik']): float(row['val']) for row in r.json().get('data', [])})
+        except (requests.RequestException, ValueError, KeyError):
+            metrics.inc('peer_index_errors_total', stage='frames')
+    return values
+
+
+def refresh_metrics(index=None, session=None, market=None, today=None):
+    from http_client import get_session
+    from market_data import get_market_data
+    index = index or get_peer_index()
+    session = session or get_session()
+    today = today or date.today()
+    with metrics.timer('peer_index_refresh_seconds'):
+        shares = fetch_frame(session, SHARES_CONCEPT, _instant_periods(today))
+        eps = fetch_frame(session, EPS_CONCEPT, _annual_periods(today))
+        classified = [p for p in index.rows() if p.sic]
+        quotes = (market or get_market_data()).quotes([p.ticker for p in classified])
+        rows = []
+        for p in index.rows():
+            q = quotes.get(p.ticker, {})
+            rows.append(p._replace(
+                shares=shares.get(p.cik, p.shares),
+                eps=eps.get(p.cik, p.eps),
+                price=q.get('price', p.price),
+                avg_volume=q.get('avg_volume', p.avg_volume),
+                return_1mo=q.get('return_1mo', p.return_1mo),
+            ))
+        index._set_rows(rows)
+        # fetch_frame / quotes swallow their errors: only a refresh that got data counts as done
+        if shares and quotes:
+            index.meta['metrics_at'] = time.time()
+        else:
+            index.meta['metrics_failed_at'] = time.time()
+            metrics.inc('peer_index_errors_total', stage='refresh')
+            log.warning("peer metrics refresh got no %s – keeping the previous values", 'shares' if not shares else 'prices')
+        index.save()
+    metrics.set_gauge('peer_index_companies', len(classified))
+    log.info("peer metrics refreshed: %d companies, %d priced", len(classified), len(quotes))
+    return index
+
+
+_PEERS = None
+_PEERS_LOCK = threading.Lock()
+
+
+def get_peer_index():
+    global _PEERS
+    with _PEERS_LOCK:
+        if _PEERS is None:
+            _PEERS = PeerIndex()
+    _PEERS.reload_if_changed()
+    return _PEERS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='peers', description="Industry peer index")
+    parser.add_argument('command', choices=('build', 'refresh'))
+    parser.add_argument('--limit', type=int, help="build: classify at most this many new companies")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    index = build(limit=args.limit) if args.command == 'build' else refresh_metrics()
+    print(f"{len(index)} companies, {sum(1 for p in index.rows() if p.market_cap)} with a market cap -> {index.path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+# replay.py – OFFLINE RECORD / REPLAY FOR EVERY HTTP CALL THE SCANNER MAKES
+#   SCANNER_RECORD=fixtures/live python -m scanner --once     # capture real responses
+#   SCANNER_REPLAY=fixtures/live python -m scanner --once     # rerun with no network
+# A cassette is a directory: index.jsonl (one line per response) + bodies/<sha256>.
+# Adapters mount on the shared session (http_client.get_session); FixtureServer
+# serves the same cassette over real sockets with injected latency and failures.
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# headers that describe the wire encoding, not the decoded body we store
+HOP_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive', 'set-cookie'}
+ORIGINAL_URL_HEADER = 'X-Replay-Url'
+
+
+# Telegram puts the bot token in the path – never write it to a fixture
+def normalize_url(url):
+    return re.sub(r'/bot[^/]+/', '/bot<token>/', url)
+
+
+def request_key(method, url):
+    return f"{method.upper()} {normalize_url(url)}"
+
+
+# === CASSETTE ===
+# Several responses recorded for one key are replayed round-robin
+class Cassette:
+    def __init__(self, root):
+        self.root = root
+        self.index_path = os.path.join(root, 'index.jsonl')
+        self.entries = defaultdict(list)
+        self._cursor = Counter()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path) as f:
+                for line in f:
+                    if line.strip():
+                        e = json.loads(line)
+                        self.entries[request_key(e['method'], e['url'])].append(e)
+        except OSError:
+            pass
+
+    def _body_path(self, digest):
+        return os.path.join(self.root, 'bodies', digest)
+
+    def add(self, method, url, status, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            'method': method.upper(),
+            'url': normalize_url(url),
+            'status': status,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS},
+            'body': digest,
+        }
+        with self._lock:
+            os.makedirs(os.path.join(self.root, 'bodies'), exist_ok=True)
+            path = self._body_path(digest)
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(body)
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+            self.entries[request_key(method, url)].append(entry)
+        return entry
+
+    # Returns (status, headers, body) or None when nothing was recorded
+    def lookup(self, method, url):
+        key = request_key(method, url)
+        with self._lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                return None
+            entry = recorded[self._cursor[key] % len(recorded)]
+            self._cursor[key] += 1
+        with open(self._body_path(entry['body']), 'rb') as f:
+            return entry['status'], entry['headers'], f.read()
+
+    def __len__(self):
+        return sum(len(v) for v in self.entries.values())
+
+
+# Recorded responses honour If-None-Match, so revalidation can be exercised offline
+def not_modified(request_headers, recorded_headers):
+    etag = {k.lower(): v for k, v in recorded_headers.items()}.get('etag')
+    return bool(etag) and request_headers.get('If-None-Match') == etag
+
+
+def build_response(request, status, headers, body):
+    r = requests.Response()
+    r.status_code = status
+    r.headers = CaseInsensitiveDict(headers)
+    r.encoding = get_encoding_from_headers(r.headers)
+    # a raw stream (not _content) so stream=True, iter_content and `with` behave as live
+    r.raw = io.BytesIO(body)
+    r.url = request.url
+    r.request = request
+    r.reason = 'OK' if status < 400 else 'Replayed'
+    return r
+
+
+# === ADAPTERS ===
+# Nothing recorded for the request: not transient, so never worth a retry
+class ReplayMiss(requests.ConnectionError):
+    pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.counts = Counter()
+
+    def send(self, request, **kwargs):
+        r = super().send(request, **kwargs)
+        self.counts[urlsplit(request.url).hostname] += 1
+        # reads the whole body even for stream=True; iter_content then replays it from memory
+        self.cassette.add(request.method, request.url, r.status_code, r.headers, r.content)
+        return r
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, cassette):
+        super().__init__()
+        self.cassette = cassette
+        self.counts = Counter()
+        self.misses = Counter()
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname
+        hit = self.cassette.lookup(request.method, request.url)
+        if hit is None:
+            self.misses[host] += 1
+            raise ReplayMiss(f"no recorded response for {request_key(request.method, request.url)}", request=request)
+        self.counts[host] += 1
+        status, headers, body = hit
+        if not_modified(request.headers, headers):
+            return build_response(request, 304, headers, b'')
+        return build_response(request, status, headers, body)
+
+    def close(self):
+        pass
+
+
+# Sends every request to a FixtureServer, carrying the original URL in a header
+class ForwardingAdapter(HTTPAdapter):
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        # a retried request arrives already rewritten
+        if ORIGINAL_URL_HEADER not in request.headers:
+            request.headers[ORIGINAL_URL_HEADER] = request.url
+            request.url = self.base_url + '/'
+        return super().send(request, **kwargs)
+
+
+def install(session, adapter):
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
+
+
+# === LOCAL STAND-IN SERVER ===
+# latency/jitter in seconds per response; failure_rate ∈ [0, 1] splits evenly
+# between HTTP 503 and a dropped connection. Unknown requests get a 404.
+class FixtureServer:
+    def __init__(self, cassette, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None, host='127.0.0.1', port=0):
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.counts = Counter()
+        self.failures = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _roll(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+            drop = fail and self._random.random() < 0.5
+        return delay, fail, drop
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                url = self.headers.get(ORIGINAL_URL_HEADER) or self.path
+                host = urlsplit(url).hostname or 'local'
+                delay, fail, drop = server._roll()
+                with server._lock:
+                    server.counts[host] += 1
+                    if fail: server.failures[host] += 1
+                if delay:
+                    time.sleep(delay)
+                if drop:
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                hit = None if fail else server.cassette.lookup(self.command, url)
+                status, headers, body = hit or ((503, {}, b'injected failure') if fail else (404, {}, b'not recorded'))
+                if hit and not_modified(self.headers, headers):
+                    status, body = 304, b''
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_HEAD = _serve
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# === ENV HOOK (used by http_client.get_session) ===
+def adapter_from_env():
+    if os.getenv('SCANNER_REPLAY'):
+        return ReplayAdapter(Cassette(os.environ['SCANNER_REPLAY']))
+    if os.getenv('SCANNER_RECORD'):
+        return RecordingAdapter(Cassette(os.environ['SCANNER_RECORD']))
+    return None
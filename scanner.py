@@ -0,0 +1,295 @@
+# scanner.py – HEADLESS SCAN DAEMON: SOURCES → GROK → TELEGRAM → SHARED STORE
+#   python -m scanner            # loop every SCAN_INTERVAL seconds
+#   python -m scanner --once     # single scan, then exit
+# The Streamlit page only reads what this process writes to DATA_DIR.
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import metrics
+from config import PEER_REFRESH_INTERVAL, RECENT_SIGNAL_HOURS, SCAN_INTERVAL, data_path
+from history import HistoryStore
+
+# The page imports this module only for the store helpers; the pipeline modules
+# (sources, filings, grok, alerts → requests/bs4/feedparser) load when a scan runs.
+
+log = logging.getLogger('scanner')
+
+ALERT_TYPES = ['SEC 8-K', '13D/G', 'Insider Cluster']
+INCREMENTAL_TYPES = ['SEC 8-K', '13D/G']      # one signal per filing, in exactly one scan
+RAW_DATA_LIMIT = 50
+RECENT_SIGNAL_LIMIT = 200
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 3 * HEARTBEAT_INTERVAL    # the page reports the scanner offline past this
+
+
+def results_path():
+    return data_path('latest_scan.json')
+
+
+def request_path():
+    return data_path('scan.request')
+
+
+def heartbeat_path():
+    return data_path('scanner.heartbeat')
+
+
+# === SHARED STORE ===
+_HISTORY = None
+
+
+def get_history():
+    global _HISTORY
+    if _HISTORY is None:
+        _HISTORY = HistoryStore()
+    return _HISTORY
+
+
+def _write_json(path, obj):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, default=str)
+    os.replace(tmp, path)
+
+
+def save_results(result):
+    _write_json(results_path(), result)
+
+
+def load_results():
+    try:
+        with open(results_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def results_mtime():
+    try:
+        return os.path.getmtime(results_path())
+    except OSError:
+        return 0
+
+
+def request_scan():
+    with open(request_path(), 'w') as f:
+        f.write(str(time.time()))
+
+
+def last_heartbeat():
+    try:
+        return os.path.getmtime(heartbeat_path())
+    except OSError:
+        return 0
+
+
+def _beat():
+    with open(heartbeat_path(), 'w') as f:
+        f.write(str(os.getpid()))
+
+
+def is_alive():
+    return time.time() - last_heartbeat() < HEARTBEAT_TIMEOUT
+
+
+# Beats from its own thread, so a long scan (SEC rate limit, Grok timeouts) doesn't look like a dead process
+def start_heartbeat(interval=HEARTBEAT_INTERVAL):
+    def run():
+        while True:
+            try:
+                _beat()
+            except OSError:
+                log.exception("heartbeat write failed")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='heartbeat', daemon=True)
+    thread.start()
+    return thread
+
+
+# === FULL FILING TEXT ===
+# Swap the atom Title+Summary for the filing's own item sections (cached per accession)
+def enrich_filings(signals):
+    from filings import get_fetcher
+    fetcher = get_fetcher()
+
+    def enrich(sig):
+        try:
+            text = fetcher.fetch(sig['link'], sig.get('form', ''), sig['items'])
+        except Exception as e:
+            log.warning("Filing fetch failed for %s: %s", sig['link'], e)
+            metrics.inc('filing_fetch_errors_total')
+            return
+        if text:
+            sig['filing_text'] = f"Title: {sig['title']}\n{text}"
+
+    pending = [sig for sig in signals if sig.get('items')]
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(4, len(pending)), thread_name_prefix='filing') as pool:
+            list(pool.map(enrich, pending))
+
+
+# === ALERTS ===
+# Only signals not alerted within the dedup window are analysed and queued;
+# the dispatcher sends them in the background, coalesced.
+# stages (optional dict) receives the enrich / grok / alerts wall times
+def dispatch_alerts(signals, stages=None):
+    stages = {} if stages is None else stages
+    t0 = time.perf_counter()
+    from alerts import dedup_window, fingerprint, format_alert, get_dispatcher
+    from grok import analyze_many
+    dispatcher = get_dispatcher()
+    candidates = [sig for sig in signals if sig['type'] in ALERT_TYPES]
+    windows = {fingerprint(sig): dedup_window(sig) for sig in candidates}
+    # no bot configured: claim nothing, so there is nothing to enrich, send or give back
+    fresh_fps = set(dispatcher.store.claim(list(windows), windows)) if dispatcher.enabled else set()
+    fresh = []
+    for sig in candidates:
+        fp = fingerprint(sig)
+        if fp not in fresh_fps: continue
+        fresh_fps.discard(fp)
+        fresh.append((sig, fp))
+    enrich_filings([sig for sig, _ in fresh])
+    t1 = time.perf_counter()
+    stages['enrich'] = t1 - t0
+    # all pending analyses go to Grok as one concurrent, budget-checked batch
+    jobs = [(sig['filing_text'], sig['type'], sig['ticker']) for sig, _ in fresh if sig.get('filing_text')]
+    analyses = dict(zip(jobs, analyze_many(jobs)))
+    t2 = time.perf_counter()
+    stages['grok'] = t2 - t1
+    tokens = 0
+    for sig, fp in fresh:
+        grok_summary = ""
+        if sig.get('filing_text'):
+            grok_summary, usage = analyses[(sig['filing_text'], sig['type'], sig['ticker'])]
+            if not usage.get('cached'):
+                tokens += usage.get('total_tokens', 0)
+            sig['grok'] = grok_summary
+        dispatcher.submit(format_alert(sig, grok_summary), fp)
+    stages['alerts'] = time.perf_counter() - t2
+    return tokens
+
+
+# === ONE SCAN ===
+# The SEC feeds are incremental, so a filing's signal shows up in one scan only.
+# The latest view carries the last RECENT_SIGNAL_HOURS of them forward from history.
+def recent_signals(signals, hours=RECENT_SIGNAL_HOURS):
+    have = {(s.get('type'), s.get('link')) for s in signals}
+    since = time.time() - hours * 3600
+    out = []
+    for type in INCREMENTAL_TYPES:
+        for sig in get_history().query_signals(type=type, since=since, limit=RECENT_SIGNAL_LIMIT):
+            key = (sig.get('type'), sig.get('link'))
+            if key not in have:
+                have.add(key)
+                out.append(sig)
+    return out
+
+
+def run_scan():
+    started = time.perf_counter()
+    from sources import collect
+    signals, raw_data, errors, timings = collect()
+    stages = {'collect': time.perf_counter() - started}
+    tokens = dispatch_alerts(signals, stages)
+    for msg in errors.values():
+        log.warning(msg)
+    carried = recent_signals(signals)
+    result = {
+        'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'signals': signals + carried,
+        'carried': len(carried),
+        'raw_data': {k: v[:RAW_DATA_LIMIT] for k, v in raw_data.items()},
+        'errors': errors,
+        'timings': timings,
+        'stages': stages,
+        'tokens': tokens,
+        'duration': time.perf_counter() - started,
+    }
+    save_results(result)
+    if signals:
+        get_history().append_scan(result['time'], signals)
+    _record_metrics(result)
+    log.info("scan done: %d signals in %.1fs", len(signals), result['duration'])
+    return result
+
+
+def _record_metrics(result):
+    for stage, seconds in result['stages'].items():
+        metrics.observe('scanner_stage_seconds', seconds, stage=stage)
+    metrics.observe('scanner_scan_seconds', result['duration'])
+    metrics.inc('scanner_scans_total')
+    new = len(result['signals']) - result.get('carried', 0)
+    metrics.inc('scanner_signals_total', new)
+    metrics.set_gauge('scanner_last_scan_signals', new)
+    metrics.set_gauge('scanner_last_scan_timestamp', time.time())
+    try:
+        metrics.export()
+    except OSError:
+        log.exception("metrics export failed")
+
+
+# === SCHEDULER ===
+# Bulk peer metrics (peers.py) run beside the scans; a scan never waits on them.
+# An index that was never built is left alone – that's `python -m peers build`.
+def refresh_peers(thread=None, interval=PEER_REFRESH_INTERVAL):
+    if thread is not None and thread.is_alive():
+        return thread
+    from peers import get_peer_index, refresh_metrics
+    index = get_peer_index()
+    if not index.is_stale(interval):
+        return thread
+
+    def run():
+        try:
+            refresh_metrics(index)
+        except Exception:
+            log.exception("peer metrics refresh failed")
+
+    thread = threading.Thread(target=run, name='peer-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+# Sleeps in short steps so a "SCAN NOW" request from the page is picked up quickly
+def run_forever(interval=SCAN_INTERVAL, poll=1.0):
+    next_run = 0
+    peer_refresh = None
+    start_heartbeat()
+    while True:
+        requested = os.path.exists(request_path())
+        if requested or time.monotonic() >= next_run:
+            if requested:
+                try: os.remove(request_path())
+                except OSError: pass
+            try:
+                run_scan()
+            except Exception:
+                log.exception("scan failed")
+            peer_refresh = refresh_peers(peer_refresh)
+            next_run = time.monotonic() + interval
+        time.sleep(poll)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='scanner', description="Headless M&A scanner")
+    parser.add_argument('--once', action='store_true', help="run a single scan and exit")
+    parser.add_argument('--interval', type=int, default=SCAN_INTERVAL, help="seconds between scans")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.once:
+        run_scan()
+        from alerts import get_dispatcher
+        get_dispatcher().flush()
+    else:
+        run_forever(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# sources.py – PLUGGABLE SOURCE COLLECTORS, RUN CONCURRENTLY
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import metrics
+from cik_index import get_index
+from classifier import get_classifier
+from edgar import EdgarIngester
+from http_client import get_session
+from insiders import Form4Feed, from_finviz, get_engine, to_signal
+from parsing import parse_finviz_insiders, parse_yahoo_news
+
+log = logging.getLogger(__name__)
+
+
+class SourceError(Exception):
+    pass
+
+
+# One per fetch, so a straggler from the last scan can't touch this scan's state.
+# pending: whatever accept() needs to commit (ingester high-water marks)
+class Result(NamedTuple):
+    signals: list
+    raw: list
+    pending: object = None
+
+
+# === COLLECTOR BASE ===
+# on_error: 'empty' → section comes back empty, 'stale' → reuse the last good result
+class Collector:
+    name = 'source'
+    label = 'Source'
+    timeout = 10
+    on_error = 'empty'
+
+    def __init__(self, timeout=None, on_error=None):
+        if timeout is not None: self.timeout = timeout
+        if on_error is not None: self.on_error = on_error
+        self.last_good = None
+
+    def fetch(self, session):
+        raise NotImplementedError
+
+    # called with the Result of a fetch that finished in time
+    def accept(self, result):
+        pass
+
+
+# === 1. M&A News ===
+class YahooNewsCollector(Collector):
+    name = 'news'
+    label = 'News'
+    on_error = 'stale'
+
+    def fetch(self, session):
+        r = session.get("https://finance.yahoo.com/news/", timeout=self.timeout)
+        r.raise_for_status()
+        items = [h._asdict() for h in parse_yahoo_news(r.content, r.headers)]
+        raw = [item['title'] for item in items]
+        signals = get_classifier(get_index().tickers()).classify_headlines(items)
+        return Result(signals, raw)
+
+
+# === 2. SEC 8-K & 13D ===
+# Only filings the ingester hasn't seen reach the classifiers; the high-water
+# mark is committed once the scan accepts the result (not on timeout).
+class SecFeedCollector(Collector):
+    name = 'sec'
+    label = 'SEC'
+    timeout = 15
+
+    def __init__(self, timeout=None, on_error=None, ingester=None):
+        super().__init__(timeout, on_error)
+        self.ingester = ingester or EdgarIngester()
+
+    def fetch(self, session):
+        entries, cursor = self.ingester.poll(session, timeout=self.timeout, deadline=time.monotonic() + self.timeout * 0.8)
+        # one pass over the new filings against the in-memory index
+        index = get_index()
+        tickers = index.lookup_many({e['cik'] for e in entries if e['cik']})
+        raw = [{'title': e['title'], 'link': e['link'], 'cik': e['cik'], 'form': e['form']} for e in entries]
+        signals = get_classifier(index.tickers()).classify_filings(entries, tickers)
+        return Result(signals, raw, (entries, cursor))
+
+    def accept(self, result):
+        self.ingester.commit(*result.pending)
+
+
+# === 3. Insider Buys ===
+# finviz's latest-trades page plus EDGAR Form 4 XML both feed the rolling
+# cluster engine (insiders.py); signals are every cluster active in its window.
+class InsiderCollector(Collector):
+    name = 'insiders'
+    label = 'Insider'
+    timeout = 20
+
+    def __init__(self, timeout=None, on_error=None, feed=None, engine=None):
+        super().__init__(timeout, on_error)
+        self.feed = feed or Form4Feed()
+        self.engine = engine
+
+    def fetch(self, session):
+        deadline = time.monotonic() + self.timeout * 0.8
+        r = session.get("https://finviz.com/insidertrading.ashx", timeout=self.timeout)
+        r.raise_for_status()
+        trades = parse_finviz_insiders(r.content, r.headers)
+        raw = [t._asdict() for t in trades]
+        transactions = from_finviz(trades)
+        pending = None
+        try:
+            form4, pending = self.feed.poll(session, timeout=min(10, self.timeout), deadline=deadline)
+            transactions += form4
+        except Exception as e:
+            # finviz alone still updates the engine; EDGAR is retried next scan
+            log.warning("Form 4 feed failed: %s", e)
+            metrics.inc('scanner_source_errors_total', source='form4')
+        engine = self.engine or get_engine()
+        signals = [to_signal(c) for c in engine.update(transactions)]
+        return Result(signals, raw, pending)
+
+    def accept(self, result):
+        if result.pending is not None:
+            self.feed.commit(result.pending)
+
+
+COLLECTORS = [YahooNewsCollector(), SecFeedCollector(), InsiderCollector()]
+
+
+# === CONCURRENT RUN ===
+# Each collector gets its own wall-clock deadline; a slow or failing source only
+# empties (or staleness-flags) its own section. Latency ≈ slowest source.
+def collect(collectors=None, session=None):
+    collectors = COLLECTORS if collectors is None else collectors
+    session = session or get_session()
+    signals, raw_data, errors, timings = [], {}, {}, {}
+
+    # timing travels with the future – a straggler never writes into this scan's dicts
+    def run(c):
+        t0 = time.perf_counter()
+        result = c.fetch(session)
+        return result, time.perf_counter() - t0
+
+    pool = ThreadPoolExecutor(max_workers=max(1, len(collectors)), thread_name_prefix='collector')
+    start = time.monotonic()
+    futures = [(c, pool.submit(run, c)) for c in collectors]
+    for c, fut in futures:
+        try:
+            result, timings[c.name] = fut.result(timeout=max(0, start + c.timeout - time.monotonic()))
+            c.last_good = result
+            c.accept(result)
+        except Exception as e:
+            if not fut.done():
+                e = SourceError(f"timed out after {c.timeout}s")
+            timings.setdefault(c.name, time.monotonic() - start)
+            errors[c.name] = f"{c.label} scrape failed: {e}"
+            result = c.last_good if c.on_error == 'stale' and c.last_good else Result([], [])
+        signals.extend(result.signals)
+        raw_data[c.name] = result.raw
+        metrics.observe('scanner_source_seconds', timings[c.name], source=c.name)
+        metrics.inc('scanner_source_items_total', len(result.raw), source=c.name)
+        if c.name in errors:
+            metrics.inc('scanner_source_errors_total', source=c.name)
+    # don't block on stragglers; their threads finish in the background
+    pool.shutdown(wait=False, cancel_futures=True)
+    return signals, raw_data, errors, timings
@@ -0,0 +1,92 @@
+# tests/test_options_screener.py – STRATEGY BUILDERS ON SMALL HAND-MADE CHAINS
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from options_screener import bull_call_spreads, cash_secured_puts, screen, takeover_calls, to_card
+
+SPOT = 100.0
+EXPIRY = (date.today() + timedelta(days=60)).isoformat()
+
+
+def chain(rows):
+    strikes, mids = zip(*rows)
+    return pd.DataFrame({'strike': strikes, 'bid': [m - 0.05 for m in mids], 'ask': [m + 0.05 for m in mids],
+                         'lastPrice': mids, 'openInterest': 1000, 'volume': 100})
+
+
+# (strike, mid) rows -> expected (long, short, cost, breakeven, max_profit, max_loss) per candidate
+@pytest.mark.parametrize('rows, expected', [
+    ([(95, 7.0), (100, 4.0)], [(95, 100, 3.0, 98.0, 2.0, 3.0)]),
+    ([(95, 7.0), (100, 4.0), (105, 2.0)], [(95, 100, 3.0, 98.0, 2.0, 3.0), (95, 105, 5.0, 100.0, 5.0, 5.0),
+                                           (100, 105, 2.0, 102.0, 3.0, 2.0)]),
+    ([(75, 26.0), (80, 21.0)], []),                 # long strike below the band
+    ([(95, 7.0), (100, 7.5)], []),                  # no debit
+])
+def test_bull_call_spreads(rows, expected):
+    out = bull_call_spreads(chain(rows), SPOT, EXPIRY)
+    got = list(out[['long_strike', 'short_strike', 'cost', 'breakeven', 'max_profit', 'max_loss']].itertuples(index=False))
+    assert np.allclose(got, expected) if expected else not got
+
+
+@pytest.mark.parametrize('rows, expected', [
+    ([(87.5, 0.5)], [(87.5, -0.5, 87.0, 0.5, 87.0)]),
+    ([(100, 3.0)], [(100, -3.0, 97.0, 3.0, 97.0)]),
+    ([(65, 0.1), (105, 6.0)], []),                 # both outside the put band
+])
+def test_cash_secured_puts(rows, expected):
+    out = cash_secured_puts(chain(rows), SPOT, EXPIRY)
+    got = list(out[['short_strike', 'cost', 'breakeven', 'max_profit', 'max_loss']].itertuples(index=False))
+    assert np.allclose(got, expected) if expected else not got
+
+
+def test_cash_secured_put_cushion_raises_chance_of_profit():
+    out = cash_secured_puts(chain([(87.5, 0.5), (100, 3.0)]), SPOT, EXPIRY).set_index('short_strike')
+    assert (out['breakeven_pct'] < 0).all()
+    assert out.loc[87.5, 'pop'] > out.loc[100, 'pop'] > 0.5
+
+
+@pytest.mark.parametrize('rows, expected', [
+    ([(110, 2.0)], [(110, 2.0, 112.0, 18.0, 2.0)]),
+    ([(125, 1.0)], [(125, 1.0, 126.0, 4.0, 1.0)]),
+    ([(95, 6.0), (135, 0.2)], []),                 # both outside the call band
+])
+def test_takeover_calls(rows, expected):
+    out = takeover_calls(chain(rows), SPOT, EXPIRY)
+    got = list(out[['long_strike', 'cost', 'breakeven', 'max_profit', 'max_loss']].itertuples(index=False))
+    assert np.allclose(got, expected) if expected else not got
+
+
+def test_takeover_card_labels_the_deal_payoff():
+    row = takeover_calls(chain([(110, 2.0)]), SPOT, EXPIRY).iloc[0]
+    card = to_card(dict(row, ticker='XYZ'))
+    assert card['max_profit_label'] == "Payoff at +30% deal premium"
+
+
+class Market:
+    class Chain:
+        calls = chain([(95, 7.0), (100, 4.0), (105, 2.0), (110, 1.0)])
+        puts = chain([(87.5, 0.5), (100, 3.0)])
+
+    def price(self, ticker): return SPOT
+    def option_expiries(self, ticker): return [EXPIRY]
+    def option_chain(self, ticker, expiry): return self.Chain
+
+
+# one score across strategies: expected return on capital at risk
+def test_screen_ranks_all_strategies_on_one_scale():
+    out = screen('XYZ', top_n=20, md=Market())
+    assert out['score'].is_monotonic_decreasing
+    assert np.allclose(out['score'], out['pop'] * out['reward_risk'] * (0.25 + 0.75 * out['liquidity']))
+    assert not out['score'].head(2).duplicated().any()
+    # a premium of 0.5 on 87.5 of collateral can't outrank a spread paying ~1:1
+    assert out.iloc[0]['strategy'] != 'cash_secured_put'
+    assert out.groupby('strategy')['score'].max()['cash_secured_put'] < 0.1
+
+
+def test_takeover_call_counts_its_payoff_at_the_deal_price():
+    out = takeover_calls(chain([(105, 2.0), (110, 1.0)]), SPOT, EXPIRY)
+    # the chance of reaching +30% doesn't depend on the strike; reaching breakeven would
+    assert out['pop'].nunique() == 1 and out['pop'].iloc[0] < 0.2